@@ -1,6 +1,6 @@
 import React, { useContext, useEffect} from 'react';
 import ReactDOM from 'react-dom';
-import { AyxAppWrapper, Box, Grid, Typography, makeStyles, Theme, TextField } from '@alteryx/ui';
+import { AyxAppWrapper, Box, Grid, Typography, makeStyles, Theme, TextField, FormControlLabel, Checkbox } from '@alteryx/ui';
 // import { Alteryx } from '@alteryx/icons';
 import { Context as UiSdkContext, DesignerApi } from '@alteryx/react-comms';
 
@@ -22,6 +22,12 @@ const App = () => {
     handleUpdateModel(newModel);
   };
 
+  const handleLogBatches = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.logBatches = e.target.checked;
+    handleUpdateModel(newModel);
+  };
+
   return (
     <Box p={4}>
       <Typography variant="h5" gutterBottom>
@@ -34,6 +40,15 @@ const App = () => {
         onChange={handleChange}
         label="Value to add"
       />
+      <FormControlLabel
+        control={
+          <Checkbox
+            checked={String(model.Configuration.logBatches) === 'true'}
+            onChange={handleLogBatches}
+          />
+        }
+        label="Log every batch (otherwise only a summary is logged)"
+      />
     </Box>
   );
 };
@@ -33,8 +33,15 @@ class TestTool(PluginV2):
         self.provider = provider # Main API object
         
         self.total_rows = 0
+        self.total_batches = 0
         # Read value from frontend config
         self.add_value = int(provider.tool_config.get("addValue", 2))
+        self.log_batches = str(provider.tool_config.get("logBatches", False)).lower() == "true" # Otherwise only log a summary
+
+        # Numeric column plan, worked out once per input schema
+        self.plan_schema = None
+        self.output_schema = None
+        self.numeric_columns = []
 
         self.provider.io.info(f"{self.name} tool started. Will add {self.add_value} to numeric columns!!.")
 
@@ -58,33 +65,53 @@ class TestTool(PluginV2):
         # Count the number of rows in this batch and add to total
         batch_count = batch.num_rows
         self.total_rows += batch_count
-        self.provider.io.info(f"Received {batch_count} rows in this batch")
-        
-        # Add to any numerical data
-        updated_columns = []
-        column_names = []
-
-        for i, column in enumerate(batch.columns):
-            field = batch.schema.field(i)
-            col_name = field.name
-            col_type = field.type
+        self.total_batches += 1
+        if self.log_batches:
+            self.provider.io.info(f"Received {batch_count} rows in this batch")
 
-            if pa.types.is_integer(col_type) or pa.types.is_floating(col_type):
-                # Add to numeric column
-                updated_col = pc.add(column, self.add_value)
-                updated_columns.append(updated_col)
-            else:
-                # Keep non-numeric columns unchanged
-                updated_columns.append(column)
+        # Add to any numerical data, keeping the original schema (types, nullability and metadata)
+        columns = batch.columns
+        for i, column_type, function, value in self.get_numeric_columns(batch.schema):
+            try:
+                columns[i] = pc.call_function(function, [columns[i].cast(column_type), value])
+            except pa.ArrowInvalid as e:
+                field = batch.schema.field(i)
+                raise ValueError(f"Adding {self.add_value} to {field.type} column '{field.name}' overflows its type: {e}") from e
 
-            column_names.append(col_name)
-
-        # Create new batch with modified columns
-        new_batch = pa.Table.from_arrays(updated_columns, names=column_names)
+        new_batch = pa.Table.from_arrays(columns, schema=self.output_schema)
 
         # Output the modified data
         self.provider.write_to_anchor("Output", new_batch)
 
+    def get_numeric_columns(self, schema: pa.Schema) -> list:
+        """
+        Return (column index, column type, compute function, value) for each numeric column.
+
+        Only recalculated when the schema changes. Columns keep their type, and the checked compute
+        functions raise on overflow rather than wrapping. A column whose type cannot hold addValue
+        at all is widened to int64 in the output schema.
+        """
+        if self.plan_schema is None or not schema.equals(self.plan_schema):
+            self.plan_schema = schema
+            self.output_schema = schema
+            self.numeric_columns = []
+            for i, field in enumerate(schema):
+                if pa.types.is_integer(field.type) or pa.types.is_floating(field.type):
+                    column_type = field.type
+                    function, value = "add_checked", self.add_value
+                    if pa.types.is_unsigned_integer(column_type) and value < 0:
+                        function, value = "subtract_checked", -value
+                    # Add a scalar of the column's own type so the result type matches the input schema
+                    try:
+                        scalar = pa.scalar(value, type=column_type)
+                    except (pa.ArrowInvalid, OverflowError):
+                        column_type = pa.int64()
+                        function, scalar = "add_checked", pa.scalar(self.add_value, type=column_type)
+                        self.output_schema = self.output_schema.set(i, field.with_type(column_type))
+                        self.provider.io.warn(f"{self.add_value} does not fit the {field.type} column '{field.name}' - writing it as int64.")
+                    self.numeric_columns.append((i, column_type, function, scalar))
+        return self.numeric_columns
+
     '''When there is an incoming anchor complete, this will be called.  Input tool does not required to handle this.'''
     def on_incoming_connection_complete(self, anchor: Anchor) -> None:
         """
@@ -115,5 +142,8 @@ class TestTool(PluginV2):
         Note: A tool with an optional input anchor and no incoming connections should
         also write any records to output anchors here.
         """
-        self.provider.io.info(f"Total rows received: {self.total_rows}")
+        self.provider.io.info(
+            f"Total rows received: {self.total_rows} in {self.total_batches} batches "
+            f"({len(self.numeric_columns)} numeric columns updated)."
+        )
         self.provider.io.info(f"{self.name} tool complete. Freeing resources.")
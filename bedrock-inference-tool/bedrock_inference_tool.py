@@ -15,11 +15,21 @@
 from typing import TYPE_CHECKING
 import pyarrow as pa
 
-import boto3 # For AWS Bedrock
-
-import re # For cleaning AWS Bedrock response
+import re # For parsing AWS Bedrock response
 import traceback # For debugging
 import json
+import os
+import random
+import time
+import hashlib
+import sqlite3 # For the local response cache
+import tempfile
+import threading
+import queue # For passing streamed rows back to the main thread
+from collections import Counter
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor # For concurrent Bedrock requests
+from urllib.parse import urlparse
 
 from ayx_python_sdk.core import (
     Anchor,
@@ -28,6 +38,684 @@ from ayx_python_sdk.core import (
 
 from ayx_python_sdk.providers.amp_provider.amp_provider_v2 import AMPProviderV2
 
+MODEL_ID = "us.anthropic.claude-3-5-sonnet-20241022-v2:0" # Default model, can be changed with the modelId setting
+CHARS_PER_TOKEN = 4 # Rough estimate of characters per token for English text and JSON
+STREAM_FLUSH_ROWS = 100 # Rows to collect before writing a streamed batch to the output anchor
+STREAM_HOLD_ROWS = 1000 # Most rows to hold back while waiting for every column of the first batch to have a value
+BATCH_MIN_RECORDS = 100 # Bedrock rejects batch inference jobs with fewer records than this
+BATCH_FINISHED_STATUSES = {"Completed", "PartiallyCompleted", "Failed", "Stopped", "Expired"}
+MICRO_BATCH_ID = "_row_id" # Field tagging each group in a micro-batch and each row returned for it
+MICRO_BATCH_REDISPATCH_ROUNDS = 2 # Times groups missing from micro-batch responses are packed again before being sent alone
+MICRO_BATCH_INSTRUCTIONS = (
+    f"Each line below is a JSON object holding one input's \"{MICRO_BATCH_ID}\" and its \"data\". "
+    "Apply the instructions to each input's data separately. "
+    f"Return one JSON array of the modified objects for every input, adding the input's \"{MICRO_BATCH_ID}\" "
+    "to each object returned for it. Do not include explanations or formatting, ONLY the JSON array."
+)
+
+# How each prompt format is introduced to the model
+PROMPT_FORMATS = {
+    "json": "The following JSON array represents tabular data",
+    "jsonl": (
+        "The following JSON lines represent tabular data. The first line lists the column names "
+        "and each following line is one row's values in the same order"
+    ),
+    "csv": "The following CSV represents tabular data, with a header row",
+    "tsv": "The following tab-separated values represent tabular data, with a header row",
+    "columnar": "The following JSON object represents tabular data, mapping each column name to its list of values",
+}
+COMPACT_SEPARATORS = (",", ":")
+
+def serialize_table(table: "pa.Table", prompt_format: str) -> str:
+    """
+    Serialize an Arrow table compactly for a prompt.
+
+    CSV and TSV are written by Arrow directly. The JSON formats convert one record batch at a
+    time, and "jsonl" / "columnar" only write the column names once.
+    """
+    if prompt_format in ("csv", "tsv"):
+        import pyarrow.csv as pa_csv # Only loaded when a CSV format is selected
+
+        sink = pa.BufferOutputStream()
+        options = pa_csv.WriteOptions(delimiter="\t" if prompt_format == "tsv" else ",")
+        pa_csv.write_csv(table, sink, write_options=options)
+        return sink.getvalue().to_pybytes().decode("utf-8")
+
+    if prompt_format == "columnar":
+        columns = {name: table.column(name).to_pylist() for name in table.column_names}
+        return json.dumps(columns, separators=COMPACT_SEPARATORS, default=str)
+
+    if prompt_format == "jsonl":
+        lines = [json.dumps(table.column_names, separators=COMPACT_SEPARATORS)]
+        for batch in table.to_batches():
+            values = [column.to_pylist() for column in batch.columns]
+            lines.extend(json.dumps(list(row), separators=COMPACT_SEPARATORS, default=str) for row in zip(*values))
+        return "\n".join(lines)
+
+    rows = []
+    for batch in table.to_batches():
+        rows.extend(json.dumps(row, separators=COMPACT_SEPARATORS, default=str) for row in batch.to_pylist())
+    return "[" + ",".join(rows) + "]"
+
+# boto3 clients shared by every tool instance in this process, keyed by service, region and credentials
+CLIENTS = {}
+CLIENTS_LOCK = threading.Lock()
+
+def get_client(service_name: str, region: str, access_key: str, secret_key: str, session_token: str = None,
+               max_attempts: int = None, max_pool_connections: int = None):
+    """
+    Return a boto3 client, creating it on first use and reusing it for later calls with the same settings.
+
+    boto3 is imported here rather than at the top of the file. Importing it and building a client is
+    slow, and neither is needed when Designer only loads the tool to validate or update its configuration.
+    `max_attempts` counts the first request too, so 1 turns botocore's own retries off.
+    `max_pool_connections` should cover every request sent at once on the client (botocore's default is 10).
+    """
+    key = (service_name, region, access_key, secret_key, session_token, max_attempts, max_pool_connections)
+    with CLIENTS_LOCK:
+        if key not in CLIENTS:
+            import boto3 # For AWS Bedrock
+            from botocore.config import Config
+
+            credentials = {
+                "aws_access_key_id": access_key,
+                "aws_secret_access_key": secret_key,
+            }
+            if session_token:
+                credentials["aws_session_token"] = session_token
+
+            config = {}
+            if max_attempts is not None:
+                config["retries"] = {"total_max_attempts": max_attempts}
+            if max_pool_connections is not None:
+                config["max_pool_connections"] = max_pool_connections
+
+            CLIENTS[key] = boto3.client(
+                service_name=service_name,
+                region_name=region,
+                config=Config(**config) if config else None,
+                **credentials
+            )
+        return CLIENTS[key]
+
+def build_anthropic_request(prompt: str, max_tokens: int, cache_prefix: str = None) -> dict:
+    """
+    Build an Anthropic messages request body.
+
+    If the prompt starts with `cache_prefix`, the prefix is sent as its own content block marked
+    with cache_control, so Bedrock can reuse it across requests.
+    """
+    content = [{"type": "text", "text": prompt}]
+    if cache_prefix and prompt.startswith(cache_prefix):
+        content = [
+            {"type": "text", "text": cache_prefix, "cache_control": {"type": "ephemeral"}},
+            {"type": "text", "text": prompt[len(cache_prefix):]},
+        ]
+    return {
+        "anthropic_version": "bedrock-2023-05-31",
+        "messages": [
+            {"role": "user", "content": content}
+        ],
+        "max_tokens": max_tokens,
+        "temperature": 0.2
+    }
+
+def build_nova_request(prompt: str, max_tokens: int, cache_prefix: str = None) -> dict:
+    """Build an Amazon Nova messages-v1 request body, with a cache point after `cache_prefix` if the prompt starts with it."""
+    content = [{"text": prompt}]
+    if cache_prefix and prompt.startswith(cache_prefix):
+        content = [{"text": cache_prefix}, {"cachePoint": {"type": "default"}}, {"text": prompt[len(cache_prefix):]}]
+    return {
+        "schemaVersion": "messages-v1",
+        "messages": [
+            {"role": "user", "content": content}
+        ],
+        "inferenceConfig": {"maxTokens": max_tokens, "temperature": 0.2}
+    }
+
+# Request body builder, the most concurrent requests to send and Bedrock prompt caching support for each known model.
+# maxWorkers caps every model's limit. Unlisted models are matched on their provider by get_model_spec.
+MODEL_REGISTRY = {
+    "us.anthropic.claude-3-5-sonnet-20241022-v2:0": {"request_builder": build_anthropic_request, "max_concurrency": 8, "prompt_caching": False},
+    "us.anthropic.claude-3-7-sonnet-20250219-v1:0": {"request_builder": build_anthropic_request, "max_concurrency": 8, "prompt_caching": True},
+    "us.anthropic.claude-3-5-haiku-20241022-v1:0": {"request_builder": build_anthropic_request, "max_concurrency": 16, "prompt_caching": True},
+    "us.amazon.nova-pro-v1:0": {"request_builder": build_nova_request, "max_concurrency": 8, "prompt_caching": True},
+    "us.amazon.nova-lite-v1:0": {"request_builder": build_nova_request, "max_concurrency": 16, "prompt_caching": True},
+    "us.amazon.nova-micro-v1:0": {"request_builder": build_nova_request, "max_concurrency": 16, "prompt_caching": True},
+}
+PROMPT_CACHE_MIN_TOKENS = 1024 # Smallest prefix Bedrock caches - some models need more
+
+def get_model_spec(model_id: str):
+    """Look up a model in the registry, falling back on its provider for unlisted model IDs (None if unknown)."""
+    if model_id in MODEL_REGISTRY:
+        return MODEL_REGISTRY[model_id]
+    if "anthropic." in model_id:
+        return {"request_builder": build_anthropic_request, "max_concurrency": 8, "prompt_caching": False}
+    if "amazon.nova" in model_id:
+        return {"request_builder": build_nova_request, "max_concurrency": 8, "prompt_caching": False}
+    return None
+
+# Characters that change the parser state inside a JSON string and between JSON tokens
+STRING_SPECIALS = re.compile(r'["\\]')
+STRUCTURE_SPECIALS = re.compile(r'[{}\[\]",]')
+
+class JsonRowParser:
+    """
+    Single-pass parser that pulls JSON objects out of model output text.
+
+    Text can be fed in pieces and each outermost object is returned as soon as it closes,
+    however deeply it is nested. Trailing commas are dropped and anything outside an object
+    (array brackets, commentary) is skipped. Objects that still fail to load are counted in
+    `malformed` instead of stopping the parse.
+    """
+
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.pending_comma = None # Comma (and following whitespace) held until we know it isn't trailing
+        self.buffer = []
+        self.malformed = 0
+
+    def feed(self, text: str) -> list:
+        """Parse the next piece of text and return the objects completed by it."""
+        rows = []
+        pos = 0
+        end = len(text)
+        while pos < end:
+            if self.depth == 0:
+                # Skip to the start of the next object
+                start = text.find("{", pos)
+                if start == -1:
+                    break
+                self.depth = 1
+                self.buffer = ["{"]
+                pos = start + 1
+            elif self.in_string:
+                if self.escaped:
+                    self.buffer.append(text[pos])
+                    self.escaped = False
+                    pos += 1
+                    continue
+                match = STRING_SPECIALS.search(text, pos)
+                if match is None:
+                    self.buffer.append(text[pos:])
+                    break
+                i = match.start()
+                self.buffer.append(text[pos:i + 1])
+                pos = i + 1
+                if text[i] == "\\":
+                    self.escaped = True
+                else:
+                    self.in_string = False
+            else:
+                match = STRUCTURE_SPECIALS.search(text, pos)
+                i = match.start() if match else end
+                chunk = text[pos:i]
+
+                if self.pending_comma is not None:
+                    if chunk.strip():
+                        self.buffer.append(self.pending_comma)
+                        self.buffer.append(chunk)
+                        self.pending_comma = None
+                    else:
+                        self.pending_comma += chunk
+                        if match is not None:
+                            if text[i] not in "}]":
+                                self.buffer.append(self.pending_comma)
+                            self.pending_comma = None
+                else:
+                    self.buffer.append(chunk)
+
+                if match is None:
+                    break
+                pos = i + 1
+                char = text[i]
+                if char == ",":
+                    self.pending_comma = ","
+                    continue
+
+                self.buffer.append(char)
+                if char == '"':
+                    self.in_string = True
+                elif char == "{":
+                    self.depth += 1
+                elif char == "}":
+                    self.depth -= 1
+                    if self.depth == 0:
+                        self.load_object(rows)
+        return rows
+
+    def load_object(self, rows: list) -> None:
+        """Load the buffered object text and add it to rows."""
+        fragment = "".join(self.buffer)
+        self.buffer = []
+        try:
+            parsed_obj = json.loads(fragment)
+        except ValueError:
+            self.malformed += 1
+            return
+        if isinstance(parsed_obj, dict):
+            rows.append(parsed_obj)
+        else:
+            self.malformed += 1
+
+    def close(self) -> None:
+        """Finish parsing, counting an unterminated object as malformed."""
+        if self.depth > 0:
+            self.malformed += 1
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.pending_comma = None
+        self.buffer = []
+
+# Bedrock errors worth retrying, and the subset that means we are sending too fast
+RETRYABLE_ERROR_CODES = {
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "ServiceUnavailableException",
+    "InternalServerException",
+    "ModelNotReadyException",
+    "ModelTimeoutException",
+}
+THROTTLING_ERROR_CODES = {"ThrottlingException", "TooManyRequestsException"}
+RETRYABLE_CONNECTION_ERRORS = {"EndpointConnectionError", "ConnectionClosedError", "ReadTimeoutError", "ConnectTimeoutError"}
+BACKOFF_BASE_SECONDS = 1
+BACKOFF_MAX_SECONDS = 60
+
+def get_error_code(error: Exception) -> str:
+    """Get the AWS error code from a botocore ClientError (empty for other errors)."""
+    response = getattr(error, "response", None)
+    if isinstance(response, dict):
+        return response.get("Error", {}).get("Code", "")
+    return ""
+
+def is_retryable(error: Exception) -> bool:
+    """Check whether a failed Bedrock call is worth retrying."""
+    return get_error_code(error) in RETRYABLE_ERROR_CODES or type(error).__name__ in RETRYABLE_CONNECTION_ERRORS
+
+class AdaptiveLimiter:
+    """
+    Limits the number of Bedrock calls in flight, adjusting the limit AIMD-style.
+
+    The limit halves when a call is throttled (at most once per cooldown, so one burst of
+    throttles only counts once) and grows by one after a full limit's worth of successful calls.
+    """
+
+    def __init__(self, max_limit: int, cooldown_seconds: float = 1.0):
+        self.max_limit = max_limit
+        self.limit = max_limit
+        self.cooldown_seconds = cooldown_seconds
+        self.in_flight = 0
+        self.successes = 0
+        self.last_decrease = 0.0
+        self.condition = threading.Condition()
+
+    def acquire(self) -> None:
+        """Block until another call is allowed."""
+        with self.condition:
+            while self.in_flight >= self.limit:
+                self.condition.wait()
+            self.in_flight += 1
+
+    def release(self, throttled: bool = False) -> None:
+        """Finish a call and adjust the limit based on whether it was throttled."""
+        with self.condition:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if throttled:
+                if now - self.last_decrease >= self.cooldown_seconds:
+                    self.limit = max(1, self.limit // 2)
+                    self.last_decrease = now
+                self.successes = 0
+            else:
+                self.successes += 1
+                if self.successes >= self.limit and self.limit < self.max_limit:
+                    self.limit += 1
+                    self.successes = 0
+            self.condition.notify_all()
+
+# Columns of the optional "Metrics" output, one row per Bedrock call
+METRICS_SCHEMA = pa.schema([
+    ("call", pa.int64()),
+    ("model_id", pa.string()),
+    ("status", pa.string()),
+    ("cache_hit", pa.bool_()),
+    ("retries", pa.int64()),
+    ("latency_ms", pa.float64()),
+    ("first_token_ms", pa.float64()),
+    ("input_tokens", pa.int64()),
+    ("output_tokens", pa.int64()),
+    ("prompt_cache_read_tokens", pa.int64()),
+    ("prompt_cache_write_tokens", pa.int64()),
+])
+
+class RunMetrics:
+    """Thread-safe per-call record of Bedrock latency, token usage, retries and cache hits for one run."""
+
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+        self.start = time.perf_counter()
+
+    def record(self, model_id: str, status: str, start: float, usage: dict = None, retries: int = None,
+               cache_hit: bool = False, first_token: float = None) -> None:
+        """Record one call, timed from its perf_counter start time."""
+        now = time.perf_counter()
+        usage = usage or {}
+        with self.lock:
+            self.calls.append({
+                "call": len(self.calls) + 1,
+                "model_id": model_id,
+                "status": status,
+                "cache_hit": cache_hit,
+                "retries": retries,
+                "latency_ms": (now - start) * 1000,
+                "first_token_ms": (first_token - start) * 1000 if first_token else None,
+                "input_tokens": usage.get("input_tokens", usage.get("inputTokens")), # Anthropic or Nova usage keys
+                "output_tokens": usage.get("output_tokens", usage.get("outputTokens")),
+                "prompt_cache_read_tokens": usage.get("cache_read_input_tokens", usage.get("cacheReadInputTokenCount")),
+                "prompt_cache_write_tokens": usage.get("cache_creation_input_tokens", usage.get("cacheWriteInputTokenCount")),
+            })
+
+    def to_table(self) -> "pa.Table":
+        with self.lock:
+            return pa.Table.from_pylist(self.calls, schema=METRICS_SCHEMA)
+
+    @staticmethod
+    def percentile(values: list, fraction: float) -> float:
+        """Nearest-rank percentile of a list of numbers."""
+        if not values:
+            return 0.0
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+    def summary(self) -> str:
+        """Describe the run's calls, latency percentiles and token throughput in one line."""
+        with self.lock:
+            calls = list(self.calls)
+        elapsed = time.perf_counter() - self.start
+        latencies = [call["latency_ms"] for call in calls if call["status"] == "ok"]
+        input_tokens = sum(call["input_tokens"] or 0 for call in calls if not call["cache_hit"])
+        output_tokens = sum(call["output_tokens"] or 0 for call in calls if not call["cache_hit"])
+        cache_read_tokens = sum(call["prompt_cache_read_tokens"] or 0 for call in calls if not call["cache_hit"])
+        cache_write_tokens = sum(call["prompt_cache_write_tokens"] or 0 for call in calls if not call["cache_hit"])
+        prompt_cache = f"Prompt cache: {cache_read_tokens} tokens read, {cache_write_tokens} written. " if cache_read_tokens or cache_write_tokens else ""
+        return (
+            f"Bedrock calls: {len(calls)} "
+            f"({sum(call['cache_hit'] for call in calls)} cached, "
+            f"{sum(call['status'] == 'error' for call in calls)} failed, "
+            f"{sum(call['retries'] or 0 for call in calls)} retries). "
+            f"Latency p50 {self.percentile(latencies, 0.5):.0f} ms, p95 {self.percentile(latencies, 0.95):.0f} ms. "
+            f"Tokens: {input_tokens} in, {output_tokens} out, "
+            f"{output_tokens / elapsed if elapsed else 0:.1f} output tokens/sec. "
+            f"{prompt_cache}"
+        ).strip()
+
+class ResponseCache:
+    """SQLite cache of API responses with a time-to-live and least-recently-used size limit."""
+
+    def __init__(self, path: str, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self.lock, self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT, created REAL, accessed REAL)"
+            )
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """Hash the request parameters into a cache key."""
+        return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        """Return the cached value for a key, or None if it is missing or expired."""
+        now = time.time()
+        with self.lock, self.connection:
+            row = self.connection.execute("SELECT value, created FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                self.misses += 1
+                return None
+            self.connection.execute("UPDATE cache SET accessed = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value) -> None:
+        """Store a value in the cache."""
+        now = time.time()
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO cache (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now)
+            )
+
+    def close(self) -> None:
+        """Drop expired entries, evict the least recently used entries over the size limit and close."""
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM cache WHERE created < ?", (time.time() - self.ttl_seconds,))
+            self.connection.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+        self.connection.close()
+
+class CheckpointJournal:
+    """
+    Append-only JSON lines file recording each completed work item so an interrupted run can resume.
+
+    Every line holds an item key and its result. Reopening the same file loads the completed
+    items, so a rerun only processes what is missing. The file is deleted once a run succeeds.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.completed = {}
+        self.lock = threading.Lock()
+        partial_line = False
+        if os.path.exists(path):
+            with open(path, "rb") as journal:
+                for line in journal:
+                    partial_line = not line.endswith(b"\n")
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue # A line cut short when the previous run stopped
+                    self.completed[entry["key"]] = entry["value"]
+        self.file = open(path, "a", encoding="utf-8")
+        if partial_line:
+            self.file.write("\n") # Start the next entry on its own line
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """Hash the item and settings that determine its result into a journal key."""
+        return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        """Return the recorded result for an item, or None if it has not completed."""
+        return self.completed.get(key)
+
+    def record(self, key: str, value) -> None:
+        """Append a completed item and flush it to disk straight away."""
+        line = json.dumps({"key": key, "value": value})
+        with self.lock:
+            self.completed[key] = value
+            self.file.write(line + "\n")
+            self.file.flush()
+
+    def close(self, delete: bool = False) -> None:
+        """Close the journal, deleting it if the run finished without failures."""
+        self.file.close()
+        if delete:
+            os.remove(self.path)
+
+class SpillBuffer:
+    """
+    Buffers incoming batches as Arrow data, spilling them to a temporary Arrow IPC file past a memory limit.
+
+    Batches stay in memory until they use more than `max_bytes`. They are then written to the spill
+    file and dropped from memory. The spill file is memory-mapped when read back, so the data is only
+    paged in as it is used and reading a subset of columns only touches those columns.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.tables = []
+        self.schema = None
+        self.buffered_bytes = 0
+        self.num_rows = 0
+        self.num_batches = 0
+        self.spill_path = None
+        self.writer = None
+        self.source = None
+
+    def __bool__(self) -> bool:
+        return self.num_batches > 0
+
+    def append(self, table: "pa.Table") -> None:
+        """Add a batch, spilling everything buffered so far if it goes over the memory limit."""
+        if self.schema is None:
+            self.schema = table.schema
+        self.tables.append(table)
+        self.buffered_bytes += table.nbytes
+        self.num_rows += table.num_rows
+        self.num_batches += 1
+        if self.buffered_bytes > self.max_bytes:
+            self.spill()
+
+    def spill(self) -> None:
+        """Write the in-memory batches to the spill file and release them."""
+        if self.writer is None:
+            fd, self.spill_path = tempfile.mkstemp(prefix="alteryx_input_", suffix=".arrow")
+            os.close(fd)
+            self.writer = pa.ipc.new_file(self.spill_path, self.schema)
+        for table in self.tables:
+            self.writer.write_table(table)
+        self.tables = []
+        self.buffered_bytes = 0
+
+    def iter_batches(self, columns: list = None):
+        """Yield the buffered data as record batches in arrival order, keeping only `columns` (names or indices) if given."""
+        if self.spill_path:
+            if self.writer is not None:
+                self.writer.close()
+                self.writer = None
+            if self.source is None:
+                self.source = pa.memory_map(self.spill_path)
+            reader = pa.ipc.open_file(self.source)
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i)
+                yield batch.select(columns) if columns is not None else batch
+        for table in self.tables:
+            for batch in table.to_batches():
+                yield batch.select(columns) if columns is not None else batch
+
+    def read_table(self, columns: list = None) -> "pa.Table":
+        """Read the buffered data as one table. Spilled batches are memory-mapped rather than copied."""
+        batches = list(self.iter_batches(columns))
+        if not batches:
+            empty_table = self.schema.empty_table()
+            return empty_table.select(columns) if columns is not None else empty_table
+        return pa.Table.from_batches(batches)
+
+    def close(self) -> None:
+        """Release the buffered batches and delete the spill file."""
+        self.tables = []
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        if self.source is not None:
+            self.source.close()
+            self.source = None
+        if self.spill_path:
+            try:
+                os.remove(self.spill_path)
+            except OSError:
+                pass # Still mapped by a table in use (Windows) - it is left in the temp folder
+            self.spill_path = None
+
+LOG_LEVELS = {"debug": 10, "info": 20, "warn": 30, "error": 40}
+
+class ToolLogger:
+    """
+    Sends the tool's messages to Designer through provider.io, filtered by log level.
+
+    Prompt and response payloads are debug messages cut to `truncate` characters, and per-row
+    messages are only sent for 1 in every `sample_rate` rows. When a trace file is set, every
+    payload is also written to it in full, so large dumps stay out of the AMP message channel.
+    """
+
+    def __init__(self, io, level: str = "info", truncate: int = 500, sample_rate: int = 100, trace_path: str = None):
+        self.io = io
+        if level not in LOG_LEVELS:
+            io.warn(f"Unknown log level '{level}' - defaulting to info.")
+        self.level = LOG_LEVELS.get(level, LOG_LEVELS["info"])
+        self.truncate = truncate
+        self.sample_rate = sample_rate
+        self.samples = 0
+        self.lock = threading.Lock()
+        self.trace_file = None
+        if trace_path:
+            try:
+                self.trace_file = open(trace_path, "a", encoding="utf-8")
+            except OSError as e:
+                io.warn(f"Could not open trace file {trace_path}: {e}")
+
+    def debug(self, message: str) -> None:
+        if self.level <= LOG_LEVELS["debug"]:
+            self.io.info(message)
+
+    def info(self, message: str) -> None:
+        if self.level <= LOG_LEVELS["info"]:
+            self.io.info(message)
+
+    def warn(self, message: str) -> None:
+        if self.level <= LOG_LEVELS["warn"]:
+            self.io.warn(message)
+
+    def error(self, message: str) -> None:
+        self.io.error(message)
+
+    def shorten(self, text: str) -> str:
+        """Cut text to the truncation length, noting how much was left out."""
+        if len(text) <= self.truncate:
+            return text
+        return f"{text[:self.truncate]}... ({len(text) - self.truncate} more characters)"
+
+    def payload(self, label: str, value) -> None:
+        """
+        Log a prompt, response or other large value.
+
+        It is only converted to text if it will be used: a truncated copy is sent at debug level
+        and the full text goes to the trace file.
+        """
+        if self.level > LOG_LEVELS["debug"] and not self.trace_file:
+            return
+        text = value if isinstance(value, str) else str(value)
+        self.debug(f"{label}: {self.shorten(text)}")
+        if self.trace_file:
+            with self.lock:
+                self.trace_file.write(f"{datetime.now().isoformat()} {label}\n{text}\n\n")
+
+    def sampled(self, label: str, value) -> None:
+        """Log a per-row debug message for only 1 in every sample_rate calls."""
+        if self.level > LOG_LEVELS["debug"]:
+            return
+        with self.lock:
+            self.samples += 1
+            send = (self.samples - 1) % self.sample_rate == 0
+        if send:
+            self.io.info(self.shorten(f"{label}: {value}"))
+
+    def close(self) -> None:
+        if self.trace_file:
+            self.trace_file.close()
+            self.trace_file = None
+
 class BedrockInferenceTool(PluginV2):
     """A sample Plugin that passes data from an input connection to an output connection."""
 
@@ -35,7 +723,16 @@ class BedrockInferenceTool(PluginV2):
         """Construct the plugin."""
         self.name = "BedrockInferenceTool"
         self.provider = provider
-        self.batches = []
+
+        # Diagnostic logging - payloads are debug messages, optionally written in full to a trace file
+        self.log = ToolLogger(
+            provider.io,
+            provider.tool_config.get("logLevel", "info"),
+            self.get_int_config("logTruncate", 500),
+            self.get_int_config("logSampleRate", 100),
+            provider.tool_config.get("traceFile") or None,
+        )
+        self.input_buffer = SpillBuffer(self.get_int_config("spillThresholdMB", 256) * 1024 * 1024) # Spilled to disk past this size
 
         self.access_key = provider.tool_config.get("accessKeyID")
         self.secret_key = provider.tool_config.get("secretAccessKey")
@@ -43,7 +740,7 @@ class BedrockInferenceTool(PluginV2):
         self.max_tokens = provider.tool_config.get("tokens", 512)
         if not self.max_tokens:
             self.max_tokens = int(512)
-            self.provider.io.warn("Defaulting to 512 max output tokens as no number was provided.")
+            self.log.warn("Defaulting to 512 max output tokens as no number was provided.")
         else:
             self.max_tokens = int(self.max_tokens)
         self.region = provider.tool_config.get("region", "us-east-1")
@@ -51,27 +748,88 @@ class BedrockInferenceTool(PluginV2):
         self.prompt_template = provider.tool_config.get("promptText") # Get prompt template from text box
         self.input_type = provider.tool_config.get("inputType", "table")
         self.output_type = "table" # provider.tool_config.get("outputType", "table")
+        self.max_workers = self.get_int_config("maxWorkers", 4) # Concurrent Bedrock requests
+        self.chunk_tokens = self.get_int_config("chunkTokens", 8000) # Prompt token budget per table chunk
+        self.prompt_format = provider.tool_config.get("promptFormat", "json") # How Table input is written in the prompt
+        if self.prompt_format not in PROMPT_FORMATS:
+            self.log.warn(f"Unknown prompt format '{self.prompt_format}' - defaulting to json.")
+            self.prompt_format = "json"
+        self.stream_response = str(provider.tool_config.get("streamResponse", False)).lower() == "true"
 
-        # Setup boto3 Bedrock client
-        if self.session_token:
-            # With session token
-            self.bedrock_client = boto3.client( 
-                service_name="bedrock-runtime",
-                region_name=self.region,
-                aws_access_key_id=self.access_key,
-                aws_secret_access_key=self.secret_key,
-                aws_session_token=self.session_token
-            )
-        else:
-            # Without session token
-            self.bedrock_client = boto3.client(
-                service_name="bedrock-runtime",
-                region_name=self.region,
-                aws_access_key_id=self.access_key,
-                aws_secret_access_key=self.secret_key,
-            )
+        # Output state for streaming mode, where rows are written in batches as they arrive
+        self.pending_rows = []
+        self.output_schema = None
+        self.rows_written = 0
+
+        # Optional local cache of model responses, shared by both Bedrock tools
+        self.cache = None
+        if str(provider.tool_config.get("useCache", False)).lower() == "true":
+            cache_path = provider.tool_config.get("cachePath") or os.path.join(tempfile.gettempdir(), "alteryx_bedrock_cache.sqlite")
+            cache_ttl_hours = self.get_int_config("cacheTtlHours", 24)
+            cache_max_entries = self.get_int_config("cacheMaxEntries", 10000)
+            try:
+                self.cache = ResponseCache(cache_path, cache_ttl_hours * 3600, cache_max_entries)
+            except sqlite3.Error as e:
+                self.log.warn(f"Could not open response cache at {cache_path}: {e}")
+
+        # Per-call latency and token usage, optionally written to the "Metrics" anchor
+        self.metrics = RunMetrics()
+        self.metrics_output = str(provider.tool_config.get("metricsOutput", False)).lower() == "true"
 
-        self.provider.io.info(f"{self.name} tool started")
+        # Retry throttled and failed calls, lowering the calls in flight while throttled
+        self.max_retries = self.get_int_config("maxRetries", 5)
+
+        # Models to use - prompts estimated at up to routingThresholdTokens go to fastModelId when it is set
+        self.model_id = provider.tool_config.get("modelId") or MODEL_ID
+        self.fast_model_id = provider.tool_config.get("fastModelId") or None
+        self.routing_threshold_tokens = self.get_int_config("routingThresholdTokens", 1000)
+        self.models = {}
+        self.limiters = {}
+        for model_id in filter(None, (self.model_id, self.fast_model_id)):
+            spec = get_model_spec(model_id)
+            if spec is None:
+                self.log.warn(f"Unknown model {model_id} - sending it Anthropic messages requests.")
+                spec = {"request_builder": build_anthropic_request, "max_concurrency": self.max_workers, "prompt_caching": False}
+            self.models[model_id] = spec
+            self.limiters[model_id] = AdaptiveLimiter(min(self.max_workers, spec["max_concurrency"]))
+
+        # Bedrock prompt caching: the prompt template goes first and is marked as a reusable prefix
+        self.prompt_caching = str(provider.tool_config.get("promptCaching", False)).lower() == "true"
+        self.cache_prefixes = {} # Prompt format -> static prefix shared by every prompt in that format
+        if self.prompt_caching:
+            for model_id, spec in self.models.items():
+                if not spec["prompt_caching"]:
+                    self.log.warn(f"{model_id} does not support prompt caching - its prompts are sent without a cache point.")
+
+        # Batch inference settings, used when executionMode is "batch"
+        self.execution_mode = provider.tool_config.get("executionMode", "realtime")
+        self.batch_s3_uri = provider.tool_config.get("batchS3Uri", "")
+        self.batch_role_arn = provider.tool_config.get("batchRoleArn", "")
+        self.batch_poll_seconds = self.get_int_config("batchPollSeconds", 60)
+
+        # Micro-batching packs several JSON groups into one request, tagging each group with its row ID
+        self.micro_batch = str(provider.tool_config.get("microBatch", False)).lower() == "true" and self.input_type == "json"
+        self.micro_batch_rows = self.get_int_config("microBatchRows", 25)
+        self.incomplete_prompts = set() # Prompts whose response had malformed or cut-off objects
+        if self.micro_batch and self.stream_response and self.execution_mode != "batch":
+            self.log.warn("Micro-batching is only used for realtime requests without streaming - sending one request per group.")
+            self.micro_batch = False
+
+        # Optional checkpoint journal so a rerun after an interruption only sends the unfinished prompts.
+        # It is opened by open_journal once there are prompts to send, so config passes never touch it.
+        self.journal = None
+        self.checkpoint_path = None
+        self.failed_prompts = 0
+        if str(provider.tool_config.get("useCheckpoint", False)).lower() == "true":
+            run_key = CheckpointJournal.make_key(
+                self.model_id, self.fast_model_id, self.routing_threshold_tokens,
+                self.max_tokens, self.prompt_template, self.input_type, self.prompt_format
+            )[:16]
+            self.checkpoint_path = provider.tool_config.get("checkpointPath") or os.path.join(tempfile.gettempdir(), f"alteryx_bedrock_checkpoint_{run_key}.jsonl")
+
+        # The boto3 Bedrock client is created on first use - see bedrock_client
+
+        self.log.info(f"{self.name} tool started")
 
     def on_record_batch(self, batch: "pa.Table", anchor: Anchor) -> None:
         """
@@ -89,7 +847,7 @@ class BedrockInferenceTool(PluginV2):
             A namedtuple('Anchor', ['name', 'connection']) containing input connection identifiers.
         """
 
-        self.batches.append(batch) # For AI table input
+        self.input_buffer.append(batch) # For AI table input
 
     def on_incoming_connection_complete(self, anchor: Anchor) -> None:
         """
@@ -102,75 +860,658 @@ class BedrockInferenceTool(PluginV2):
         anchor
             NamedTuple containing anchor.name and anchor.connection.
         """
-        self.provider.io.info(
+        self.log.info(
             f"Received complete update from {anchor.name}:{anchor.connection}."
         )
 
-    def analyse_with_bedrock(self, prompt: str) -> None:
-        native_request = {
-            "anthropic_version": "bedrock-2023-05-31",
-            "messages": [
-                {"role": "user", "content": [{"type": "text", "text": prompt}]}
-            ],
-            "max_tokens": self.max_tokens,
-            "temperature": 0.2
-        }
+    def create_client(self, service_name: str, max_attempts: int = None, max_pool_connections: int = None):
+        """Get a boto3 client for an AWS service using the tool's credentials."""
+        return get_client(service_name, self.region, self.access_key, self.secret_key, self.session_token, max_attempts,
+                          max_pool_connections)
+
+    @property
+    def bedrock_client(self):
+        """The bedrock-runtime client, created the first time a request is sent."""
+        # Every model's requests share this client, so its pool needs a connection for each request in flight
+        in_flight = sum(limiter.max_limit for limiter in self.limiters.values())
+        return self.create_client(
+            "bedrock-runtime",
+            max_attempts=1, # Retries are handled by call_with_retry
+            max_pool_connections=max(10, in_flight),
+        )
+
+    def get_int_config(self, key: str, default: int) -> int:
+        """Read a positive integer from the tool config, falling back to the default if invalid."""
+        value = self.provider.tool_config.get(key, default)
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            value = 0
+        if value < 1:
+            self.provider.io.warn(f"Invalid value for {key} - defaulting to {default}.")
+            return default
+        return value
+
+    def call_with_retry(self, call, model_id: str):
+        """
+        Run a Bedrock call within the model's concurrency limit, retrying errors that are worth retrying.
+
+        Retries use exponential backoff with full jitter. Throttling also lowers the number of
+        calls allowed in flight until calls start succeeding again.
+        Returns the call's result and the number of retries it took.
+        """
+        limiter = self.limiters[model_id]
+        for attempt in range(self.max_retries + 1):
+            limiter.acquire()
+            try:
+                result = call()
+            except Exception as e:
+                error_code = get_error_code(e)
+                limiter.release(throttled=error_code in THROTTLING_ERROR_CODES)
+                if attempt == self.max_retries or not is_retryable(e):
+                    raise
+                delay = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+                self.log.warn(
+                    f"Bedrock call failed ({error_code or type(e).__name__}) - "
+                    f"retry {attempt + 1} of {self.max_retries} in {delay:.1f}s."
+                )
+                time.sleep(delay)
+            else:
+                limiter.release()
+                return result, attempt
+
+    def invoke_bedrock(self, native_request: dict, model_id: str):
+        """Invoke the model, or return the cached response body for an identical request."""
+        start = time.perf_counter()
+
+        cache_key = None
+        if self.cache:
+            cache_key = ResponseCache.make_key(model_id, native_request)
+            result = self.cache.get(cache_key)
+            if result is not None:
+                self.metrics.record(model_id, "ok", start, result.get("usage"), cache_hit=True)
+                return result
 
         # Set up client and response
         bedrock = self.bedrock_client
         request = json.dumps(native_request).encode('utf-8')
 
         try:
-            # Invoke Bedrock model (Claude Sonnet 3.5 v2)
-            response = bedrock.invoke_model(
-                modelId="us.anthropic.claude-3-5-sonnet-20241022-v2:0", # CHANGE MODEL HERE
+            # Invoke Bedrock model
+            response, retries = self.call_with_retry(lambda: bedrock.invoke_model(
+                modelId=model_id,
                 body=request,
                 accept="application/json",
                 contentType="application/json"
-            )
+            ), model_id)
         except Exception as e:
-            self.provider.io.error(f"Error invoking model: {e}")
-            self.provider.io.error(traceback.format_exc())
-            return
+            self.metrics.record(model_id, "error", start)
+            self.log.error(f"Error invoking model: {e}")
+            self.log.error(traceback.format_exc())
+            return None
         
-        self.provider.io.info(f"Success response: {response}")
+        self.log.debug(f"Bedrock response metadata: {response.get('ResponseMetadata', {})}")
 
         try:
             result = json.loads(response['body'].read().decode('utf-8'))
-            self.provider.io.info(f"Bedrock response received: {result}")
-            
-            content = result.get("content", "")
+        except Exception as e:
+            self.metrics.record(model_id, "error", start, retries=retries)
+            self.log.error(f"Error reading model response: {e}")
+            return None
 
-            if isinstance(content, list) and content and isinstance(content[0], dict) and 'text' in content[0]:
-                text = content[0]['text']
-            else:
-                text = content
+        self.metrics.record(model_id, "ok", start, result.get("usage"), retries=retries)
+        if self.cache:
+            self.cache.set(cache_key, result)
+        return result
 
-            json_objects = re.findall(r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', str(text), re.DOTALL)
+    def stream_bedrock(self, native_request: dict, on_text, model_id: str) -> bool:
+        """
+        Invoke the model with response streaming, passing each piece of generated text to on_text.
 
-            for obj_str in json_objects:
-                try:
-                    # Clean up the JSON string
-                    cleaned_str = obj_str.strip()
-                    # Remove any trailing commas before closing braces
-                    cleaned_str = re.sub(r',\s*}', '}', cleaned_str)
-                    cleaned_str = re.sub(r',\s*]', ']', cleaned_str)
-                    
-                    parsed_obj = json.loads(cleaned_str)
-                    self.provider.io.info(f"Parsed: {parsed_obj}")
-                    self.parsed_data.append(parsed_obj)
-                except Exception as e:
-                    print(f"Error parsing JSON object: {e}")
-                    print(f"Problematic JSON string: {obj_str}")
+        Identical requests are answered from the response cache when it is enabled.
+        Only starting the stream is retried, as rows from a stream that fails part-way may
+        already have been written. Returns False if the request failed.
+        Both Anthropic and Nova stream events are understood.
+        """
+        start = time.perf_counter()
+
+        cache_key = None
+        if self.cache:
+            cache_key = ResponseCache.make_key(model_id, native_request)
+            result = self.cache.get(cache_key)
+            if result is not None:
+                self.metrics.record(model_id, "ok", start, result.get("usage"), cache_hit=True)
+                on_text(self.get_response_text(result))
+                return True
+
+        text_parts = []
+        usage = {}
+        retries = None
+        first_token = None
+        try:
+            response, retries = self.call_with_retry(lambda: self.bedrock_client.invoke_model_with_response_stream(
+                modelId=model_id,
+                body=json.dumps(native_request).encode('utf-8'),
+                accept="application/json",
+                contentType="application/json"
+            ), model_id)
+
+            for event in response["body"]:
+                chunk = event.get("chunk")
+                if not chunk:
                     continue
+                message = json.loads(chunk["bytes"].decode('utf-8'))
+                text = None
+                if message.get("type") == "content_block_delta":
+                    text = message.get("delta", {}).get("text", "")
+                elif "contentBlockDelta" in message: # Nova
+                    text = message["contentBlockDelta"].get("delta", {}).get("text", "")
+                elif message.get("type") == "message_start":
+                    usage.update(message.get("message", {}).get("usage", {}))
+                elif message.get("type") == "message_delta":
+                    usage.update(message.get("usage", {}))
+                elif "metadata" in message: # Nova
+                    usage.update(message["metadata"].get("usage", {}))
+                if text:
+                    if first_token is None:
+                        first_token = time.perf_counter()
+                    text_parts.append(text)
+                    on_text(text)
+        except Exception as e:
+            self.metrics.record(model_id, "error", start, usage, retries, first_token=first_token)
+            self.log.error(f"Error streaming model response: {e}")
+            self.log.error(traceback.format_exc())
+            return False
+
+        self.metrics.record(model_id, "ok", start, usage, retries, first_token=first_token)
+
+        # Store in the same shape as an invoke_model body so either mode can reuse it
+        if self.cache:
+            self.cache.set(cache_key, {"content": [{"type": "text", "text": "".join(text_parts)}], "usage": usage})
+        return True
+
+    def build_request(self, prompt: str, model_id: str, use_prompt_cache: bool = True) -> dict:
+        """Build the request body for a prompt in the format the model expects, marking its cacheable prefix if enabled."""
+        spec = self.models[model_id]
+        cache_prefix = None
+        if self.prompt_caching and use_prompt_cache and spec["prompt_caching"]:
+            cache_prefix = next((prefix for prefix in self.cache_prefixes.values() if prompt.startswith(prefix)), None)
+        return spec["request_builder"](prompt, self.max_tokens, cache_prefix)
+
+    def route_prompt(self, prompt: str) -> str:
+        """Pick the model for a prompt: the fast model for small prompts when one is set, otherwise the main model."""
+        if self.fast_model_id and self.estimate_tokens(prompt) <= self.routing_threshold_tokens:
+            return self.fast_model_id
+        return self.model_id
+
+    def route_prompts(self, prompts: list) -> list:
+        """Pick the model for each prompt, logging how many prompts go to each model."""
+        routes = [self.route_prompt(prompt) for prompt in prompts]
+        if self.fast_model_id:
+            for model_id, count in Counter(routes).items():
+                self.log.info(f"Routing {count} of {len(prompts)} prompts to {model_id}.")
+        return routes
+
+    def create_model_executors(self, routes: list) -> dict:
+        """
+        Create a thread pool for each model prompts are routed to, sized to the model's concurrency limit.
+
+        Separate pools let the models run side by side - a prompt waiting on a busy model never holds
+        up prompts for the other one.
+        """
+        return {model_id: ThreadPoolExecutor(max_workers=self.limiters[model_id].max_limit) for model_id in set(routes)}
+
+    def get_response_text(self, result: dict) -> str:
+        """Get the generated text out of an Anthropic or Nova response body."""
+        if "output" in result: # Nova
+            content = result["output"].get("message", {}).get("content", [])
+            return "".join(block.get("text", "") for block in content)
+
+        content = result.get("content", "")
+
+        if isinstance(content, list) and content and isinstance(content[0], dict) and 'text' in content[0]:
+            return content[0]['text']
+        return str(content)
+
+    def analyse_with_bedrock(self, prompt: str, model_id: str):
+        """Send a prompt to Bedrock and return the JSON rows parsed from the response (None on error)."""
+        result = self.invoke_bedrock(self.build_request(prompt, model_id), model_id)
+        if result is None:
+            return None
+
+        try:
+            self.log.payload("Bedrock response", result)
+
+            text = self.get_response_text(result)
+
+            parser = JsonRowParser()
+            parsed = parser.feed(str(text))
+            parser.close()
+            for parsed_obj in parsed:
+                self.log.sampled("Parsed", parsed_obj)
+            if parser.malformed:
+                self.log.warn(f"Skipped {parser.malformed} malformed JSON objects in the model response.")
+                self.incomplete_prompts.add(prompt)
+
+            return parsed
 
         except Exception as e:
-            self.provider.io.error(f"Error parsing model response: {e}")
+            self.log.error(f"Error parsing model response: {e}")
+            return None
+
+    def choose_execution_mode(self, record_count: int) -> None:
+        """
+        Settle the execution mode once the number of prompts is known, before they are built.
+
+        Bedrock rejects batch jobs with fewer than BATCH_MIN_RECORDS records, so smaller runs are sent
+        as realtime requests and keep their checkpoint and micro-batching settings. Runs that stay in
+        batch mode do not use either, as a job sends every prompt once and returns all the results.
+        """
+        if self.execution_mode != "batch":
+            return
+        if record_count < BATCH_MIN_RECORDS:
+            self.log.warn(
+                f"Bedrock batch jobs need at least {BATCH_MIN_RECORDS} records and this run has {record_count} - "
+                "sending them as realtime requests instead."
+            )
+            self.execution_mode = "realtime"
+            if self.micro_batch and self.stream_response:
+                self.log.warn("Micro-batching is only used for realtime requests without streaming - sending one request per group.")
+                self.micro_batch = False
+            return
+        if self.micro_batch:
+            self.log.warn("Micro-batching is not used for batch inference jobs - sending one record per group.")
+            self.micro_batch = False
+        if self.checkpoint_path:
+            self.log.warn("Checkpoints are not used for batch inference jobs.")
+            self.checkpoint_path = None
+
+    def open_journal(self) -> None:
+        """Open the checkpoint journal, if enabled, once the prompts are ready to send."""
+        if self.checkpoint_path is None or self.journal is not None:
+            return
+        try:
+            self.journal = CheckpointJournal(self.checkpoint_path)
+        except OSError as e:
+            self.log.warn(f"Could not open checkpoint journal at {self.checkpoint_path}: {e}")
+
+    def analyse_with_checkpoint(self, prompt: str, model_id: str):
+        """Return a prompt's rows from the checkpoint journal, or analyse it and record the rows."""
+        if not self.journal:
+            return self.analyse_with_bedrock(prompt, model_id)
+
+        journal_key = CheckpointJournal.make_key(prompt)
+        rows = self.journal.get(journal_key)
+        if rows is None:
+            rows = self.analyse_with_bedrock(prompt, model_id)
+            if rows is not None:
+                self.journal.record(journal_key, rows)
+        return rows
+
+    def analyse_prompts(self, prompts: list, failed: list = None) -> list:
+        """
+        Send prompts to Bedrock concurrently, routing each one to a model.
+
+        Each model gets its own pool, sending at most its concurrency limit of requests at a time.
+        Returns one list of parsed rows per prompt, in the same order as the prompts.
+        A failed request only loses its own rows - the other prompts still complete. Pass a
+        list as failed to collect the indexes of the failed prompts.
+        """
+        routes = self.route_prompts(prompts)
+        executors = self.create_model_executors(routes)
+        try:
+            futures = [
+                executors[model_id].submit(self.analyse_with_checkpoint, prompt, model_id)
+                for prompt, model_id in zip(prompts, routes)
+            ]
+
+            results = []
+            for i, future in enumerate(futures):
+                try:
+                    rows = future.result()
+                except Exception as e:
+                    self.log.error(f"Error processing prompt {i + 1}: {e}")
+                    self.log.error(traceback.format_exc())
+                    rows = None
+                if rows is None:
+                    self.failed_prompts += 1
+                    if failed is not None:
+                        failed.append(i)
+                    rows = []
+                results.append(rows)
+        finally:
+            for executor in executors.values():
+                executor.shutdown()
+
+        return results
+
+    def create_micro_batches(self, items: list):
+        """
+        Pack (row ID, JSON string) items into micro-batch prompts, returning the prompts and the row IDs in each.
+
+        Each batch holds up to microBatchRows items. Like a table chunk, its prompt must fit the
+        chunkTokens budget and its items must fit the max output tokens, as the model returns a
+        modified copy of them. An item over the budget on its own is sent in a batch by itself.
+        """
+        overhead = self.estimate_tokens(self.create_micro_batch_prompt(""))
+        budget = max(1, min(self.chunk_tokens - overhead, self.max_tokens))
+
+        prompts = []
+        batch_ids = []
+        lines = []
+        ids = []
+        batch_tokens = 0
+        for row_id, json_string in items:
+            try:
+                data = json.loads(json_string)
+            except (TypeError, ValueError):
+                data = json_string
+            line = json.dumps({MICRO_BATCH_ID: row_id, "data": data}, separators=COMPACT_SEPARATORS)
+            line_tokens = self.estimate_tokens(line)
+            if lines and (batch_tokens + line_tokens > budget or len(lines) >= self.micro_batch_rows):
+                prompts.append(self.create_micro_batch_prompt("\n".join(lines)))
+                batch_ids.append(ids)
+                lines, ids, batch_tokens = [], [], 0
+            lines.append(line)
+            ids.append(row_id)
+            batch_tokens += line_tokens
+        if lines:
+            prompts.append(self.create_micro_batch_prompt("\n".join(lines)))
+            batch_ids.append(ids)
+
+        for prompt in prompts:
+            self.log.payload("Prompt", prompt)
+        self.log.info(f"Packed {len(items)} groups into {len(prompts)} micro-batch prompts.")
+        return prompts, batch_ids
+
+    def analyse_micro_batches(self, prompts: list, batch_ids: list, json_strings: list) -> list:
+        """
+        Send micro-batch prompts and split the rows in each response back out by row ID.
+
+        A complete response covers every group in its batch, so groups it returns no rows for are
+        left empty. Groups without rows from a failed request, or from a response with malformed
+        objects or rows without a matching row ID, are packed into new micro-batches up to
+        MICRO_BATCH_REDISPATCH_ROUNDS times, then sent as single prompts.
+        Returns one list of parsed rows per JSON string, in the same order as the strings.
+        """
+        results = [None] * len(json_strings)
+        failed_prompts = self.failed_prompts # Only groups still missing at the end count as failed
+
+        for round_number in range(MICRO_BATCH_REDISPATCH_ROUNDS + 1):
+            unmatched = 0
+            failed = []
+            responses = self.analyse_prompts(prompts, failed)
+            failed = set(failed)
+            for index, (ids, rows) in enumerate(zip(batch_ids, responses)):
+                expected = set(ids)
+                batch_unmatched = 0
+                for row in rows:
+                    row_id = row.pop(MICRO_BATCH_ID, None) if isinstance(row, dict) else None
+                    try:
+                        row_id = int(row_id)
+                    except (TypeError, ValueError):
+                        row_id = None
+                    if row_id not in expected:
+                        batch_unmatched += 1
+                        continue
+                    if results[row_id] is None:
+                        results[row_id] = []
+                    results[row_id].append(row)
+                unmatched += batch_unmatched
+                if not batch_unmatched and index not in failed and prompts[index] not in self.incomplete_prompts:
+                    for row_id in ids:
+                        if results[row_id] is None:
+                            results[row_id] = []
+            if unmatched:
+                self.log.warn(f"Skipped {unmatched} rows without a matching {MICRO_BATCH_ID} in the micro-batch responses.")
+
+            missing = [i for i, rows in enumerate(results) if rows is None]
+            if not missing or round_number == MICRO_BATCH_REDISPATCH_ROUNDS:
+                break
+            self.log.info(f"{len(missing)} groups were in failed or incomplete micro-batch responses - sending them again.")
+            prompts, batch_ids = self.create_micro_batches([(i, json_strings[i]) for i in missing])
+
+        self.failed_prompts = failed_prompts
+        if missing:
+            self.log.warn(f"{len(missing)} groups are still missing after micro-batching - sending them one at a time.")
+            single_prompts = [self.create_prompt(json_strings[i]) for i in missing]
+            for i, rows in zip(missing, self.analyse_prompts(single_prompts)):
+                results[i] = rows
+
+        return results
+
+    def stream_with_bedrock(self, prompt: str, on_rows, model_id: str) -> bool:
+        """
+        Stream a prompt's response from Bedrock, passing rows to on_rows as soon as each one is complete.
+
+        Prompts recorded in the checkpoint journal pass their rows on without calling Bedrock.
+        Returns False if the request failed.
+        """
+        journal_key = None
+        prompt_rows = []
+        if self.journal:
+            journal_key = CheckpointJournal.make_key(prompt)
+            rows = self.journal.get(journal_key)
+            if rows is not None:
+                on_rows(rows)
+                return True
+
+        parser = JsonRowParser()
+
+        def on_text(text: str) -> None:
+            rows = parser.feed(text)
+            if rows:
+                if self.journal:
+                    prompt_rows.extend(rows)
+                on_rows(rows)
+
+        succeeded = self.stream_bedrock(self.build_request(prompt, model_id), on_text, model_id)
+        parser.close()
+        if parser.malformed:
+            self.log.warn(f"Skipped {parser.malformed} malformed JSON objects in the model response.")
+        if succeeded and self.journal:
+            self.journal.record(journal_key, prompt_rows)
+        return succeeded
+
+    def stream_prompts(self, prompts: list, order: list = None) -> None:
+        """
+        Stream prompts concurrently and write their rows to the output as they arrive.
+
+        Each request passes its rows back through its own queue. The main thread drains the
+        queues in output order, so rows keep the input order and are only written from one thread.
+        `order` lists the prompt index for each output position (default: each prompt once).
+        Rows of a prompt that appears again later are kept until its last position is written.
+        """
+        if order is None:
+            order = list(range(len(prompts)))
+        remaining = Counter(order)
+        finished_rows = {}
+
+        row_queues = [queue.Queue() for _ in prompts]
+        succeeded = [False] * len(prompts)
+        routes = self.route_prompts(prompts)
+
+        def run(i: int, prompt: str) -> None:
+            try:
+                succeeded[i] = self.stream_with_bedrock(prompt, row_queues[i].put, routes[i])
+            except Exception as e:
+                self.log.error(f"Error processing prompt {i + 1}: {e}")
+                self.log.error(traceback.format_exc())
+            finally:
+                row_queues[i].put(None) # Marks the end of this prompt's rows
+
+        executors = self.create_model_executors(routes)
+        try:
+            for i, prompt in enumerate(prompts):
+                executors[routes[i]].submit(run, i, prompt)
+
+            for i in order:
+                if i in finished_rows:
+                    self.output_rows(finished_rows[i])
+                else:
+                    prompt_rows = []
+                    rows = row_queues[i].get()
+                    while rows is not None:
+                        self.output_rows(rows)
+                        if remaining[i] > 1:
+                            prompt_rows.extend(rows)
+                        rows = row_queues[i].get()
+                    finished_rows[i] = prompt_rows
+
+                remaining[i] -= 1
+                if remaining[i] == 0:
+                    del finished_rows[i]
+        finally:
+            for executor in executors.values():
+                executor.shutdown()
+
+        self.failed_prompts += succeeded.count(False)
+        self.flush_output()
+
+    def output_rows(self, rows: list) -> None:
+        """Add streamed rows to the output, writing a batch once enough rows have built up."""
+        self.pending_rows.extend(rows)
+        if len(self.pending_rows) >= STREAM_FLUSH_ROWS:
+            self.flush_output(final=False)
+
+    def flush_output(self, final: bool = True) -> None:
+        """
+        Write the pending streamed rows to the output anchor.
+
+        The first batch sets the output schema, which every later batch is converted to, so the
+        record layout never changes part-way through. Columns the model adds later are dropped
+        and missing ones are null. Rows that do not fit the schema are skipped and counted.
+        While a column has no values yet, the first batch is held back (up to STREAM_HOLD_ROWS rows)
+        so its type comes from real values. A column still without values is written as string.
+        """
+        if not self.pending_rows:
             return
+        if self.output_schema is None and not final and len(self.pending_rows) < STREAM_HOLD_ROWS:
+            filled = {key for row in self.pending_rows for key, value in row.items() if value is not None}
+            if any(key not in filled for row in self.pending_rows for key in row):
+                return
+        rows, self.pending_rows = self.pending_rows, []
+        try:
+            output_table = self.rows_to_table(rows)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError) as e:
+            tables = []
+            for row in rows:
+                try:
+                    tables.append(self.rows_to_table([row]))
+                except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+                    pass
+            self.log.error(f"Skipped {len(rows) - len(tables)} rows that do not match the output schema: {e}")
+            if not tables:
+                return
+            output_table = pa.concat_tables(tables)
+        self.provider.write_to_anchor("Output", output_table)
+        self.rows_written += output_table.num_rows
+
+    def rows_to_table(self, rows: list) -> "pa.Table":
+        """Convert streamed rows to a table with the output schema, setting the schema from the first rows."""
+        if self.output_schema is not None:
+            return pa.Table.from_pylist(rows, schema=self.output_schema)
+        table = pa.Table.from_pylist(rows)
+        schema = pa.schema([field.with_type(pa.string()) if pa.types.is_null(field.type) else field for field in table.schema])
+        table = table.cast(schema)
+        self.output_schema = table.schema
+        return table
+
+    def run_batch_job(self, prompts: list):
+        """
+        Run prompts as a Bedrock batch inference job instead of one request each.
+
+        The requests are written to S3 as JSONL, submitted with create_model_invocation_job and
+        polled until the job finishes. The output JSONL is then read back from S3 and parsed.
+        A job runs on a single model, so every prompt goes to the main model without routing.
+        Returns one list of parsed rows per prompt, in prompt order, or None if the job failed.
+        """
+        bucket_uri = urlparse(self.batch_s3_uri)
+        if bucket_uri.scheme != "s3" or not bucket_uri.netloc or not self.batch_role_arn:
+            self.log.error("Batch mode needs an S3 location (s3://bucket/prefix) and a service role ARN.")
+            return None
+
+        bucket = bucket_uri.netloc
+        job_name = f"{self.name.lower()}-{int(time.time())}"
+        job_prefix = "/".join(part for part in (bucket_uri.path.strip("/"), job_name) if part)
+        input_key = f"{job_prefix}/input.jsonl"
+        output_prefix = f"{job_prefix}/output/"
+
+        s3 = self.create_client("s3")
+        bedrock = self.create_client("bedrock")
+
+        records = [
+            json.dumps({"recordId": f"{i:011d}", "modelInput": self.build_request(prompt, self.model_id, use_prompt_cache=False)})
+            for i, prompt in enumerate(prompts)
+        ]
+        start = time.perf_counter()
+        try:
+            s3.put_object(Bucket=bucket, Key=input_key, Body="\n".join(records).encode('utf-8'))
+            job = bedrock.create_model_invocation_job(
+                jobName=job_name,
+                roleArn=self.batch_role_arn,
+                modelId=self.model_id,
+                inputDataConfig={"s3InputDataConfig": {"s3Uri": f"s3://{bucket}/{input_key}", "s3InputFormat": "JSONL"}},
+                outputDataConfig={"s3OutputDataConfig": {"s3Uri": f"s3://{bucket}/{output_prefix}"}},
+            )
+            self.log.info(f"Submitted batch inference job {job_name} with {len(prompts)} records.")
+
+            status = ""
+            while status not in BATCH_FINISHED_STATUSES:
+                time.sleep(self.batch_poll_seconds)
+                job_details = bedrock.get_model_invocation_job(jobIdentifier=job["jobArn"])
+                status = job_details["status"]
+                self.log.info(f"Batch inference job {job_name}: {status}")
+        except Exception as e:
+            self.log.error(f"Error running batch inference job: {e}")
+            self.log.error(traceback.format_exc())
+            return None
+
+        if status not in ("Completed", "PartiallyCompleted"):
+            self.log.error(f"Batch inference job {job_name} ended with status {status}: {job_details.get('message', '')}")
+            return None
+
+        results = [[] for _ in prompts]
+        failed_records = 0
+        malformed = 0
+        try:
+            paginator = s3.get_paginator("list_objects_v2")
+            for page in paginator.paginate(Bucket=bucket, Prefix=output_prefix):
+                for item in page.get("Contents", []):
+                    if not item["Key"].endswith(".jsonl.out"):
+                        continue # Skip the job's manifest file
+                    body = s3.get_object(Bucket=bucket, Key=item["Key"])["Body"].read().decode('utf-8')
+                    for line in body.splitlines():
+                        if not line.strip():
+                            continue
+                        record = json.loads(line)
+                        model_output = record.get("modelOutput")
+                        if not model_output:
+                            failed_records += 1
+                            self.metrics.record(self.model_id, "error", start)
+                            continue
+                        self.metrics.record(self.model_id, "ok", start, model_output.get("usage"))
+                        parser = JsonRowParser()
+                        results[int(record["recordId"])] = parser.feed(self.get_response_text(model_output))
+                        parser.close()
+                        malformed += parser.malformed
+        except Exception as e:
+            self.log.error(f"Error reading batch inference output: {e}")
+            self.log.error(traceback.format_exc())
+            return None
+
+        if failed_records:
+            self.log.warn(f"{failed_records} records failed in batch inference job {job_name}.")
+        if malformed:
+            self.log.warn(f"Skipped {malformed} malformed JSON objects in the batch inference output.")
+        return results
+
+    def create_prompt(self, input_data: str, prompt_format: str = "json") -> str:
+        if self.prompt_caching:
+            return f"{self.get_cache_prefix(prompt_format)}{input_data}" # A null group reads "None", as below
 
-    def create_prompt(self, input_data) -> str:
         prompt = (
-            f"The following JSON array represents tabular data:\n{input_data}\n\n"
+            f"{PROMPT_FORMATS[prompt_format]}:\n{input_data}\n\n"
             f"{self.prompt_template}\n\n"
             "Please return a modified version of this data as a JSON array of objects. "
             "Do not include explanations or formatting, ONLY the JSON array."
@@ -178,16 +1519,115 @@ class BedrockInferenceTool(PluginV2):
 
         return prompt
 
+    def create_micro_batch_prompt(self, input_lines: str) -> str:
+        """Build the prompt for a micro-batch of JSON groups, one tagged group per line."""
+        if self.prompt_caching:
+            return self.get_cache_prefix("micro_batch") + input_lines
+
+        prompt = (
+            f"{MICRO_BATCH_INSTRUCTIONS}\n{input_lines}\n\n"
+            f"{self.prompt_template}"
+        )
+
+        return prompt
+
+    def get_cache_prefix(self, prompt_format: str) -> str:
+        """
+        Return the static start of every prompt when prompt caching is on.
+
+        The template and instructions come before the data so they form a prefix that is the same
+        for every prompt. Bedrock can then cache it after the first request.
+        """
+        if prompt_format not in self.cache_prefixes:
+            if prompt_format == "micro_batch":
+                prefix = f"{self.prompt_template}\n\n{MICRO_BATCH_INSTRUCTIONS}\n"
+            else:
+                prefix = (
+                    f"{self.prompt_template}\n\n"
+                    "Please return a modified version of the data below as a JSON array of objects. "
+                    "Do not include explanations or formatting, ONLY the JSON array.\n\n"
+                    f"{PROMPT_FORMATS[prompt_format]}:\n"
+                )
+            prefix_tokens = self.estimate_tokens(prefix)
+            if prefix_tokens < PROMPT_CACHE_MIN_TOKENS:
+                self.log.warn(
+                    f"The prompt template is about {prefix_tokens} tokens - Bedrock only caches prefixes "
+                    f"of at least {PROMPT_CACHE_MIN_TOKENS} tokens, so it will not be cached."
+                )
+            self.cache_prefixes[prompt_format] = prefix
+        return self.cache_prefixes[prompt_format]
+
+    def estimate_tokens(self, text: str) -> int:
+        """Estimate the number of tokens in a piece of text."""
+        return len(text) // CHARS_PER_TOKEN + 1
+
+    def chunk_table(self, input_table: "pa.Table") -> list:
+        """
+        Split a table into windows that each fit in one prompt, returning each window serialized.
+
+        The prompt for a window must fit the chunkTokens budget. The model returns a modified
+        copy of the rows, so the rows in a window must also fit the max output tokens, and the
+        smaller of the two is kept as chunk_budget. Window sizes start from the average row size
+        of a sample, and any window that still comes out over budget is halved until it fits.
+        """
+        overhead = self.estimate_tokens(self.create_prompt("", self.prompt_format))
+        budget = min(self.chunk_tokens - overhead, self.max_tokens)
+        if budget < 1:
+            self.log.warn("Prompt template is larger than the chunk token budget - sending one row per prompt.")
+            budget = 1
+        self.chunk_budget = budget
+
+        sample = input_table.slice(0, 100)
+        tokens_per_row = self.estimate_tokens(serialize_table(sample, self.prompt_format)) / max(1, sample.num_rows)
+        rows_per_chunk = max(1, int(budget / tokens_per_row))
+
+        chunks = []
+        for offset in range(0, input_table.num_rows, rows_per_chunk):
+            self.split_to_budget(input_table.slice(offset, rows_per_chunk), budget, chunks)
+        return chunks
+
+    def split_to_budget(self, window: "pa.Table", budget: int, chunks: list) -> None:
+        """Serialize a window of rows, halving it until it fits the token budget."""
+        text = serialize_table(window, self.prompt_format)
+        if window.num_rows > 1 and self.estimate_tokens(text) > budget:
+            half = window.num_rows // 2
+            self.split_to_budget(window.slice(0, half), budget, chunks)
+            self.split_to_budget(window.slice(half), budget, chunks)
+        else:
+            chunks.append(text)
 
     def write_output(self) -> None:
-        self.provider.io.info(f"Parsed data: {self.parsed_data}")
+        self.log.payload("Parsed data", self.parsed_data)
         if isinstance(self.parsed_data, list) and all(isinstance(row, dict) for row in self.parsed_data):
             output_table = pa.Table.from_pylist(self.parsed_data) # Output table from response
             self.provider.write_to_anchor("Output", output_table)
-            self.provider.io.info("Output table written successfully.")
+            self.log.info("Output table written successfully.")
         else:
             raise ValueError("Unexpected format: AI output is not as expected.")
 
+    def free_resources(self, finished: bool = True) -> None:
+        """
+        Report the run's metrics, log the cache hit rate and close the input buffer, response cache, checkpoint journal and trace file.
+
+        Pass finished=False when the run stops before sending any prompts, so the checkpoint journal is kept for the next run.
+        """
+        self.input_buffer.close()
+        self.log.close()
+        if self.metrics.calls:
+            self.log.info(self.metrics.summary())
+        if self.metrics_output:
+            self.provider.write_to_anchor("Metrics", self.metrics.to_table())
+        if self.cache:
+            self.log.info(f"Response cache: {self.cache.hits} hits, {self.cache.misses} misses.")
+            self.cache.close()
+            self.cache = None
+        if self.journal:
+            # Keep the journal if any prompt failed so a rerun only retries those prompts
+            self.journal.close(delete=finished and self.failed_prompts == 0)
+            if self.failed_prompts:
+                self.log.warn(f"{self.failed_prompts} prompts failed. Rerun to retry them - completed prompts are kept in {self.journal.path}.")
+            self.journal = None
+
     def on_complete(self) -> None:
         """
         Clean up any plugin resources, or push records for an input tool.
@@ -203,37 +1643,103 @@ class BedrockInferenceTool(PluginV2):
         """
         # Return errors if mandatory fields are not completed
         if not self.prompt_template:
-            self.provider.io.error("No prompt was provided.")
+            self.log.error("No prompt was provided.")
+            self.free_resources(finished=False)
             return
         elif not self.access_key or not self.secret_key:
-            self.provider.io.error("Missing AWS credentials.")
+            self.log.error("Missing AWS credentials.")
+            self.free_resources(finished=False)
             return
-            
-        # Combine all input batches into one table
-        if self.batches:
-            input_table = pa.concat_tables(self.batches)
-            input_rows = input_table.to_pylist()
-        else:
-            self.provider.io.error("No input data received.")
+
+        if not self.input_buffer:
+            self.log.error("No input data received.")
+            self.free_resources(finished=False)
             return
+        if self.input_buffer.spill_path:
+            self.log.info(f"Input of {self.input_buffer.num_rows} rows was spilled to {self.input_buffer.spill_path}.")
 
         self.parsed_data = []
+        order = None
+        batch_ids = None
         if self.input_type == "json": # Writes output for every group by
-            for json_object in input_rows:
-                json_string = next(iter(json_object.values()))
+            # Send each distinct group once, then copy its rows to every group with the same value
+            json_strings = [
+                json_string
+                for batch in self.input_buffer.iter_batches(columns=[0]) # Only the grouped JSON column is read
+                for json_string in batch.column(0).to_pylist()
+            ]
+            unique_strings = list(dict.fromkeys(json_strings))
+            unique_index = {json_string: i for i, json_string in enumerate(unique_strings)}
+            order = [unique_index[json_string] for json_string in json_strings]
+            self.choose_execution_mode(len(unique_strings))
+
+            if self.micro_batch:
+                prompts, batch_ids = self.create_micro_batches(list(enumerate(unique_strings)))
+            else:
+                prompts = []
+                for json_string in unique_strings:
+                    prompt = self.create_prompt(json_string)
 
-                prompt = self.create_prompt(json_string)
+                    self.log.payload("Prompt", prompt)
+                    prompts.append(prompt)
 
-                self.provider.io.info("Sending prompt to AWS Bedrock..." + prompt)
-                
-                self.analyse_with_bedrock(prompt)
+            self.log.info(
+                f"Sending {len(prompts)} prompts for {len(json_strings)} groups "
+                f"with up to {self.max_workers} concurrent requests."
+            )
             
         else: # ungrouped data
-            prompt = self.create_prompt(input_rows)
+            input_table = self.input_buffer.read_table()
+            chunks = self.chunk_table(input_table)
+            self.choose_execution_mode(len(chunks))
+            prompts = []
+            for chunk in chunks:
+                prompt = self.create_prompt(chunk, self.prompt_format)
 
-            self.provider.io.info("Sending prompt to AWS Bedrock..." + prompt)
-            self.analyse_with_bedrock(prompt)
-            
-        self.write_output()
-        
-        self.provider.io.info(f"{self.name} tool complete. Freeing resources.")
\ No newline at end of file
+                self.log.payload("Prompt", prompt)
+                prompts.append(prompt)
+
+            self.log.info(
+                f"Split {input_table.num_rows} rows into {len(chunks)} chunks of up to {self.chunk_budget} tokens of rows "
+                f"(chunk token budget {self.chunk_tokens}, capped by max output tokens {self.max_tokens})."
+            )
+
+        self.open_journal()
+        if self.journal:
+            resumed = sum(CheckpointJournal.make_key(prompt) in self.journal.completed for prompt in prompts)
+            if resumed:
+                self.log.info(f"Resuming from checkpoint: {resumed} of {len(prompts)} prompts already completed.")
+
+        if self.stream_response and self.execution_mode != "batch":
+            try:
+                self.stream_prompts(prompts, order)
+            except Exception:
+                # Keep the checkpoint journal so a rerun resumes from the completed prompts
+                self.free_resources(finished=False)
+                raise
+            if self.rows_written == 0:
+                self.log.warn("No rows were returned by the model.")
+            self.log.info(f"Streamed {self.rows_written} rows to the output.")
+            self.free_resources()
+        else:
+            if self.execution_mode == "batch":
+                results = self.run_batch_job(prompts)
+                if results is None:
+                    self.free_resources()
+                    return
+            elif batch_ids is not None:
+                results = self.analyse_micro_batches(prompts, batch_ids, unique_strings)
+            else:
+                results = self.analyse_prompts(prompts)
+
+            for i in (order if order is not None else range(len(results))):
+                self.parsed_data.extend(results[i])
+
+            try:
+                self.write_output()
+            except Exception:
+                self.free_resources(finished=False)
+                raise
+            self.free_resources()
+
+        self.log.info(f"{self.name} tool complete. Freeing resources.")
\ No newline at end of file
@@ -1,6 +1,6 @@
 import React, { useContext } from 'react';
 import ReactDOM from 'react-dom';
-import { AyxAppWrapper, Box, Typography, TextField, RadioGroup, Radio, FormControlLabel } from '@alteryx/ui';
+import { AyxAppWrapper, Box, Typography, TextField, RadioGroup, Radio, FormControlLabel, Checkbox } from '@alteryx/ui';
 import { Context as UiSdkContext, DesignerApi } from '@alteryx/react-comms';
 
 const App = () => {
@@ -30,6 +30,24 @@ const App = () => {
     handleUpdateModel(newModel);
   };
 
+  const handleModelId = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.modelId = e.target.value;
+    handleUpdateModel(newModel);
+  };
+
+  const handleFastModelId = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.fastModelId = e.target.value;
+    handleUpdateModel(newModel);
+  };
+
+  const handleRoutingThresholdTokens = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.routingThresholdTokens = e.target.value;
+    handleUpdateModel(newModel);
+  };
+
   const handlePromptChange = (e) => {
     const newModel = { ...model };
     newModel.Configuration.promptText = e.target.value;
@@ -54,6 +72,138 @@ const App = () => {
     handleUpdateModel(newModel);
   };
 
+  const handleMaxWorkers = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.maxWorkers = e.target.value;
+    handleUpdateModel(newModel);
+  };
+
+  const handleChunkTokens = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.chunkTokens = e.target.value;
+    handleUpdateModel(newModel);
+  };
+
+  const handleMicroBatch = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.microBatch = e.target.checked;
+    handleUpdateModel(newModel);
+  };
+
+  const handleMicroBatchRows = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.microBatchRows = e.target.value;
+    handleUpdateModel(newModel);
+  };
+
+  const handleUseCheckpoint = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.useCheckpoint = e.target.checked;
+    handleUpdateModel(newModel);
+  };
+
+  const handleUseCache = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.useCache = e.target.checked;
+    handleUpdateModel(newModel);
+  };
+
+  const handleCacheTtlHours = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.cacheTtlHours = e.target.value;
+    handleUpdateModel(newModel);
+  };
+
+  const handleCacheMaxEntries = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.cacheMaxEntries = e.target.value;
+    handleUpdateModel(newModel);
+  };
+
+  const handleStreamResponse = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.streamResponse = e.target.checked;
+    handleUpdateModel(newModel);
+  };
+
+  const handleSpillThresholdMB = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.spillThresholdMB = e.target.value;
+    handleUpdateModel(newModel);
+  };
+
+  const handleMaxRetries = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.maxRetries = e.target.value;
+    handleUpdateModel(newModel);
+  };
+
+  const handlePromptFormatChange = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.promptFormat = e.target.value;
+    handleUpdateModel(newModel);
+  };
+
+  const handlePromptCaching = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.promptCaching = e.target.checked;
+    handleUpdateModel(newModel);
+  };
+
+  const handleMetricsOutput = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.metricsOutput = e.target.checked;
+    handleUpdateModel(newModel);
+  };
+
+  const handleExecutionModeChange = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.executionMode = e.target.value;
+    handleUpdateModel(newModel);
+  };
+
+  const handleBatchS3Uri = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.batchS3Uri = e.target.value;
+    handleUpdateModel(newModel);
+  };
+
+  const handleBatchRoleArn = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.batchRoleArn = e.target.value;
+    handleUpdateModel(newModel);
+  };
+
+  const handleBatchPollSeconds = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.batchPollSeconds = e.target.value;
+    handleUpdateModel(newModel);
+  };
+
+  const handleLogLevelChange = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.logLevel = e.target.value;
+    handleUpdateModel(newModel);
+  };
+
+  const handleLogTruncate = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.logTruncate = e.target.value;
+    handleUpdateModel(newModel);
+  };
+
+  const handleLogSampleRate = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.logSampleRate = e.target.value;
+    handleUpdateModel(newModel);
+  };
+
+  const handleTraceFile = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.traceFile = e.target.value;
+    handleUpdateModel(newModel);
+  };
+
   return (
     <Box p={4}>
       <Typography variant="h5" gutterBottom>
@@ -100,6 +250,67 @@ const App = () => {
         onChange={handleTokens}
         label="Enter max number of output tokens, e.g. 512"
       />
+      <Typography variant="h5" gutterBottom>
+        Concurrent requests for Grouped JSON (default: 4):
+      </Typography>
+      <TextField
+        fullWidth
+        id="max_workers"
+        value={model.Configuration.maxWorkers || 4}
+        type="number"
+        onChange={handleMaxWorkers}
+        label="Enter number of Bedrock requests to run at once, e.g. 4"
+      />
+      <Typography variant="h5" gutterBottom>
+        Maximum prompt tokens per Table chunk (default: 8000):
+      </Typography>
+      <TextField
+        fullWidth
+        id="chunk_tokens"
+        value={model.Configuration.chunkTokens || 8000}
+        type="number"
+        onChange={handleChunkTokens}
+        label="Large tables are split into chunks of this many tokens, e.g. 8000. Chunks are also capped at the max output tokens"
+      />
+      <FormControlLabel
+        control={
+          <Checkbox
+            checked={String(model.Configuration.microBatch) === 'true'}
+            onChange={handleMicroBatch}
+          />
+        }
+        label="Micro-batch Grouped JSON: send several groups per request, split back out by row ID"
+      />
+      <TextField
+        fullWidth
+        id="micro_batch_rows"
+        value={model.Configuration.microBatchRows || 25}
+        type="number"
+        onChange={handleMicroBatchRows}
+        label="Max groups per micro-batch (default: 25)"
+      />
+      <Typography variant="h5" gutterBottom>
+        Retries for throttled or failed requests (default: 5):
+      </Typography>
+      <TextField
+        fullWidth
+        id="max_retries"
+        value={model.Configuration.maxRetries || 5}
+        type="number"
+        onChange={handleMaxRetries}
+        label="Enter max retries per request, e.g. 5"
+      />
+      <Typography variant="h5" gutterBottom>
+        Input memory limit in MB (default: 256):
+      </Typography>
+      <TextField
+        fullWidth
+        id="spill_threshold_mb"
+        value={model.Configuration.spillThresholdMB || 256}
+        type="number"
+        onChange={handleSpillThresholdMB}
+        label="Input beyond this size is buffered in a temporary file"
+      />
       <Typography variant="h5" gutterBottom>
         Region (default: us-east-1):
       </Typography>
@@ -111,6 +322,30 @@ const App = () => {
         label="Region"
         placeholder="Enter AWS region"
       />
+      <Typography variant="h5" gutterBottom>
+        Model:
+      </Typography>
+      <TextField
+        fullWidth
+        id="model_id"
+        value={model.Configuration.modelId || 'us.anthropic.claude-3-5-sonnet-20241022-v2:0'}
+        onChange={handleModelId}
+        label="Model ID"
+      />
+      <TextField
+        fullWidth
+        id="fast_model_id"
+        value={model.Configuration.fastModelId || ''}
+        onChange={handleFastModelId}
+        label="Fast model ID for small prompts (optional), e.g. us.anthropic.claude-3-5-haiku-20241022-v1:0"
+      />
+      <TextField
+        type="number"
+        id="routing_threshold_tokens"
+        value={model.Configuration.routingThresholdTokens || 1000}
+        onChange={handleRoutingThresholdTokens}
+        label="Send prompts up to this many tokens to the fast model (default: 1000)"
+      />
       <Typography variant="h5" gutterBottom>
         Write a prompt:
       </Typography>
@@ -140,6 +375,125 @@ const App = () => {
         </RadioGroup>
       </Box>
 
+      <Box mt={3}>
+        <FormControlLabel
+          control={
+            <Checkbox
+              checked={String(model.Configuration.streamResponse) === 'true'}
+              onChange={handleStreamResponse}
+            />
+          }
+          label="Stream the model response and output rows as they arrive"
+        />
+        <FormControlLabel
+          control={
+            <Checkbox
+              checked={String(model.Configuration.metricsOutput) === 'true'}
+              onChange={handleMetricsOutput}
+            />
+          }
+          label="Write per-call latency and token metrics to the Metrics output"
+        />
+        <FormControlLabel
+          control={
+            <Checkbox
+              checked={String(model.Configuration.promptCaching) === 'true'}
+              onChange={handlePromptCaching}
+            />
+          }
+          label="Use Bedrock prompt caching for the prompt template (the template is sent before the data)"
+        />
+      </Box>
+
+      <Box mt={3}>
+        <FormControlLabel
+          control={
+            <Checkbox
+              checked={String(model.Configuration.useCheckpoint) === 'true'}
+              onChange={handleUseCheckpoint}
+            />
+          }
+          label="Save progress and resume interrupted runs (only unfinished prompts are sent again)"
+        />
+        <FormControlLabel
+          control={
+            <Checkbox
+              checked={String(model.Configuration.useCache) === 'true'}
+              onChange={handleUseCache}
+            />
+          }
+          label="Cache model responses locally (reruns with identical prompts skip Bedrock)"
+        />
+        <TextField
+          type="number"
+          id="cache_ttl_hours"
+          value={model.Configuration.cacheTtlHours || 24}
+          onChange={handleCacheTtlHours}
+          label="Cache expiry in hours (default: 24)"
+        />
+        <TextField
+          type="number"
+          id="cache_max_entries"
+          value={model.Configuration.cacheMaxEntries || 10000}
+          onChange={handleCacheMaxEntries}
+          label="Max cached responses (default: 10000)"
+        />
+      </Box>
+
+      <Box mt={3}>
+        <Typography variant="h6" gutterBottom>
+          Select Execution Mode:
+        </Typography>
+        <RadioGroup
+          value={model.Configuration.executionMode || 'realtime'}
+          onChange={handleExecutionModeChange}
+          aria-label="execution mode"
+          name="execution-mode-group"
+        >
+          <FormControlLabel value="realtime" control={<Radio />} label="Real-time (one request per prompt)" />
+          <FormControlLabel value="batch" control={<Radio />} label="Batch inference job (cheaper, results in minutes to hours)" />
+        </RadioGroup>
+        <TextField
+          id="batch_s3_uri"
+          value={model.Configuration.batchS3Uri || ''}
+          onChange={handleBatchS3Uri}
+          label="Batch S3 location (s3://bucket/prefix)"
+          fullWidth
+        />
+        <TextField
+          id="batch_role_arn"
+          value={model.Configuration.batchRoleArn || ''}
+          onChange={handleBatchRoleArn}
+          label="Batch service role ARN"
+          fullWidth
+        />
+        <TextField
+          type="number"
+          id="batch_poll_seconds"
+          value={model.Configuration.batchPollSeconds || 60}
+          onChange={handleBatchPollSeconds}
+          label="Seconds between job status checks (default: 60)"
+        />
+      </Box>
+
+      <Box mt={3}>
+        <Typography variant="h6" gutterBottom>
+          Select Table Prompt Format:
+        </Typography>
+        <RadioGroup
+          value={model.Configuration.promptFormat || 'json'}
+          onChange={handlePromptFormatChange}
+          aria-label="prompt format"
+          name="prompt-format-group"
+        >
+          <FormControlLabel value="json" control={<Radio />} label="JSON array" />
+          <FormControlLabel value="jsonl" control={<Radio />} label="JSON lines (header once)" />
+          <FormControlLabel value="csv" control={<Radio />} label="CSV" />
+          <FormControlLabel value="tsv" control={<Radio />} label="TSV" />
+          <FormControlLabel value="columnar" control={<Radio />} label="Columnar JSON" />
+        </RadioGroup>
+      </Box>
+
       <Box mt={3}>
         <Typography variant="h6" gutterBottom>
           Select Output Type:
@@ -153,6 +507,44 @@ const App = () => {
           <FormControlLabel value="table" control={<Radio />} label="Output Table" />
         </RadioGroup>
       </Box>
+
+      <Box mt={3}>
+        <Typography variant="h6" gutterBottom>
+          Log Level:
+        </Typography>
+        <RadioGroup
+          value={model.Configuration.logLevel || 'info'}
+          onChange={handleLogLevelChange}
+          aria-label="log level"
+          name="log-level-group"
+        >
+          <FormControlLabel value="debug" control={<Radio />} label="Debug (prompts, responses and sampled per-row messages)" />
+          <FormControlLabel value="info" control={<Radio />} label="Info" />
+          <FormControlLabel value="warn" control={<Radio />} label="Warnings and errors only" />
+          <FormControlLabel value="error" control={<Radio />} label="Errors only" />
+        </RadioGroup>
+        <TextField
+          type="number"
+          id="log_truncate"
+          value={model.Configuration.logTruncate || 500}
+          onChange={handleLogTruncate}
+          label="Characters of each logged payload (default: 500)"
+        />
+        <TextField
+          type="number"
+          id="log_sample_rate"
+          value={model.Configuration.logSampleRate || 100}
+          onChange={handleLogSampleRate}
+          label="Log 1 in every N per-row messages (default: 100)"
+        />
+        <TextField
+          fullWidth
+          id="trace_file"
+          value={model.Configuration.traceFile || ''}
+          onChange={handleTraceFile}
+          label="Trace file for full payloads (optional)"
+        />
+      </Box>
     </Box>
   );
 };
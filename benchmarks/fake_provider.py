@@ -0,0 +1,56 @@
+"""In-process stand-in for AMPProviderV2 so plugins can be driven without Alteryx Designer."""
+import time
+from collections import namedtuple
+
+import pyarrow as pa
+
+Anchor = namedtuple("Anchor", ["name", "connection"])
+
+
+class FakeIO:
+    """Counts the messages a plugin sends through provider.io instead of sending them to Designer."""
+
+    def __init__(self, verbose: bool = False):
+        self.verbose = verbose
+        self.counts = {"info": 0, "warn": 0, "error": 0}
+        self.message_bytes = 0
+        self.errors = []
+
+    def _log(self, level: str, message) -> None:
+        message = str(message)
+        self.counts[level] += 1
+        self.message_bytes += len(message)
+        if level == "error":
+            self.errors.append(message)
+        if self.verbose:
+            print(f"[{level}] {message[:500]}")
+
+    def info(self, message) -> None:
+        self._log("info", message)
+
+    def warn(self, message) -> None:
+        self._log("warn", message)
+
+    def error(self, message) -> None:
+        self._log("error", message)
+
+
+class FakeProvider:
+    """Provides tool_config, io and write_to_anchor like AMPProviderV2, recording what is written."""
+
+    def __init__(self, tool_config: dict, verbose: bool = False, keep_output: bool = False):
+        self.tool_config = tool_config
+        self.io = FakeIO(verbose)
+        self.keep_output = keep_output
+        self.outputs = {}
+        self.rows_written = {}
+        self.batches_written = {}
+        self.first_write_time = None
+
+    def write_to_anchor(self, name: str, table: "pa.Table") -> None:
+        if self.first_write_time is None:
+            self.first_write_time = time.perf_counter()
+        self.rows_written[name] = self.rows_written.get(name, 0) + table.num_rows
+        self.batches_written[name] = self.batches_written.get(name, 0) + 1
+        if self.keep_output:
+            self.outputs.setdefault(name, []).append(table)
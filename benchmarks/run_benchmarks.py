@@ -0,0 +1,261 @@
+"""
+Benchmark the plugins locally with a fake provider and stub Bedrock / Custom Search backends.
+
+Each scenario runs in a fresh process so peak RSS is measured per scenario. For example:
+
+    python benchmarks/run_benchmarks.py --tools bedrock-json google --rows 100 1000 --batch-sizes 100
+    python benchmarks/run_benchmarks.py --tools bedrock-json --set maxWorkers=16 --set streamResponse=true
+"""
+import argparse
+import importlib.util
+import json
+import multiprocessing
+import sys
+import time
+import types
+from pathlib import Path
+
+import pyarrow as pa
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_provider import Anchor, FakeProvider # noqa: E402
+from stubs import StubBedrockBatchClient, StubBedrockClient, StubS3Client, StubSearchServer # noqa: E402
+
+try:
+    import resource # Not available on Windows
+except ImportError:
+    resource = None
+
+BEDROCK_CONFIG = {"accessKeyID": "stub", "secretAccessKey": "stub", "promptText": "Summarise each row."}
+
+TOOLS = {
+    "test": {
+        "path": "add-two-test-tool/test_tool.py",
+        "class": "TestTool",
+        "config": {"addValue": 2},
+        "backend": None,
+        "rows": [100000, 1000000],
+    },
+    "bedrock-json": {
+        "path": "bedrock-inference-tool/bedrock_inference_tool.py",
+        "class": "BedrockInferenceTool",
+        "config": dict(BEDROCK_CONFIG, inputType="json"),
+        "backend": "bedrock",
+        "rows": [100, 1000],
+    },
+    "bedrock-table": {
+        "path": "bedrock-inference-tool/bedrock_inference_tool.py",
+        "class": "BedrockInferenceTool",
+        "config": dict(BEDROCK_CONFIG, inputType="table"),
+        "backend": "bedrock",
+        "rows": [100, 1000],
+    },
+    "bedrock-batch": {
+        "path": "bedrock-inference-tool/bedrock_inference_tool.py",
+        "class": "BedrockInferenceTool",
+        "config": dict(
+            BEDROCK_CONFIG,
+            inputType="json",
+            executionMode="batch",
+            batchS3Uri="s3://stub-bucket/jobs",
+            batchRoleArn="arn:aws:iam::000000000000:role/stub",
+            batchPollSeconds=1,
+        ),
+        "backend": "bedrock",
+        "rows": [100, 1000],
+    },
+    "generic": {
+        "path": "generic-bedrock-tool/generic_bedrock_tool.py",
+        "class": "BedrockInferenceTool",
+        "config": dict(BEDROCK_CONFIG, outputType="table"),
+        "backend": "bedrock",
+        "rows": [100, 1000],
+    },
+    "google": {
+        "path": "google-api-tool/google_api_tool.py",
+        "class": "GoogleAPITool",
+        "config": {"apiKey": "stub", "searchEngineId": "stub", "maxNum": 10, "queriesPerSecond": 1000},
+        "backend": "google",
+        "rows": [100, 1000],
+    },
+    "google-pages": {
+        "path": "google-api-tool/google_api_tool.py",
+        "class": "GoogleAPITool",
+        "config": {
+            "apiKey": "stub",
+            "searchEngineId": "stub",
+            "maxNum": 10,
+            "queriesPerSecond": 1000,
+            "fetchPageText": True,
+            "pageConnectionsPerHost": 20, # Every stub page is on one host, so allow as many connections as pages in flight
+        },
+        "backend": "google",
+        "rows": [100, 1000],
+    },
+}
+
+
+def make_input(tool: str, rows: int) -> "pa.Table":
+    """Build an input table shaped like the data each tool expects."""
+    ids = list(range(rows))
+    if tool in ("bedrock-json", "bedrock-batch"):
+        return pa.table({"group_json": [json.dumps({"group": i, "items": [f"item {i}-{j}" for j in range(5)]}) for i in ids]})
+    if tool in ("google", "google-pages"):
+        return pa.table({"query": [f"company {i % 500} annual report" for i in ids]})
+    return pa.table({
+        "id": pa.array(ids, pa.int64()),
+        "name": [f"name {i}" for i in ids],
+        "value": pa.array([i * 0.5 for i in ids], pa.float64()),
+    })
+
+
+def load_plugin(path: str):
+    """Import a plugin module from its file in the repo."""
+    spec = importlib.util.spec_from_file_location(Path(path).stem, ROOT / path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024 # Bytes on macOS, KB on Linux
+
+
+def run_scenario(scenario: dict) -> dict:
+    """Run one plugin lifecycle (__init__, on_record_batch, on_complete) and time each stage."""
+    tool = TOOLS[scenario["tool"]]
+    module = load_plugin(tool["path"])
+    input_table = make_input(scenario["tool"], scenario["rows"])
+    config = dict(tool["config"], **scenario["overrides"])
+
+    stub = None
+    server = None
+    if tool["backend"] == "bedrock":
+        stub = StubBedrockClient(scenario["latency"], scenario["error_rate"], scenario["rows_per_response"])
+        s3 = StubS3Client()
+        clients = {"bedrock-runtime": stub, "s3": s3, "bedrock": StubBedrockBatchClient(s3, stub)}
+        # The plugins import boto3 when they first need a client, so a stand-in module is enough
+        sys.modules["boto3"] = types.SimpleNamespace(client=lambda service_name=None, **kwargs: clients[service_name])
+    elif tool["backend"] == "google":
+        server = StubSearchServer(scenario["latency"], scenario["error_rate"]).__enter__()
+        module.SEARCH_URL = server.url
+
+    provider = FakeProvider(config, verbose=scenario["verbose"])
+    rss_before = peak_rss_mb()
+    anchor = Anchor("Input", "")
+
+    try:
+        start = time.perf_counter()
+        plugin = getattr(module, tool["class"])(provider)
+        init_done = time.perf_counter()
+        for batch in input_table.to_batches(max_chunksize=scenario["batch_size"]):
+            plugin.on_record_batch(pa.Table.from_batches([batch]), anchor)
+        batches_done = time.perf_counter()
+        plugin.on_incoming_connection_complete(anchor)
+        plugin.on_complete()
+        end = time.perf_counter()
+    finally:
+        if server:
+            server.__exit__(None, None, None)
+
+    wall = end - start
+    return {
+        "tool": scenario["tool"],
+        "rows": scenario["rows"],
+        "batch_size": scenario["batch_size"],
+        "wall_s": wall,
+        "rows_per_s": scenario["rows"] / wall if wall else float("inf"),
+        "init_s": init_done - start,
+        "batches_s": batches_done - init_done,
+        "complete_s": end - batches_done,
+        "first_output_s": provider.first_write_time - start if provider.first_write_time else None,
+        "output_rows": provider.rows_written.get("Output", 0),
+        "remote_calls": stub.calls if stub else (server.requests if server else 0),
+        "io_messages": sum(provider.io.counts.values()),
+        "io_kb": provider.io.message_bytes / 1024,
+        "errors": provider.io.counts["error"],
+        "peak_rss_mb": peak_rss_mb(),
+        "rss_before_mb": rss_before,
+    }
+
+
+COLUMNS = [
+    ("tool", "{}"), ("rows", "{}"), ("batch_size", "{}"), ("wall_s", "{:.3f}"), ("rows_per_s", "{:.1f}"),
+    ("init_s", "{:.3f}"), ("batches_s", "{:.3f}"), ("complete_s", "{:.3f}"), ("first_output_s", "{:.3f}"),
+    ("output_rows", "{}"), ("remote_calls", "{}"), ("io_messages", "{}"), ("io_kb", "{:.1f}"),
+    ("errors", "{}"), ("peak_rss_mb", "{:.1f}"),
+]
+
+
+def format_results(results: list) -> str:
+    """Format results as a fixed-width text table."""
+    cells = [[name for name, _ in COLUMNS]]
+    for result in results:
+        cells.append(["-" if result[name] is None else fmt.format(result[name]) for name, fmt in COLUMNS])
+    widths = [max(len(row[i]) for row in cells) for i in range(len(COLUMNS))]
+    return "\n".join("  ".join(cell.rjust(width) for cell, width in zip(row, widths)) for row in cells)
+
+
+def parse_overrides(values: list) -> dict:
+    overrides = {}
+    for value in values:
+        key, _, setting = value.partition("=")
+        overrides[key] = setting
+    return overrides
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tools", nargs="+", choices=sorted(TOOLS), default=sorted(TOOLS))
+    parser.add_argument("--rows", nargs="+", type=int, help="Row counts to run (default: per tool)")
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1000], help="Rows per input batch")
+    parser.add_argument("--latency", type=float, default=0.05, help="Stub backend latency per call in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of stub calls that fail with throttling")
+    parser.add_argument("--rows-per-response", type=int, default=5, help="Rows in each stub Bedrock response")
+    parser.add_argument("--set", dest="overrides", action="append", default=[], metavar="KEY=VALUE",
+                        help="Override a tool config value, e.g. --set maxWorkers=8")
+    parser.add_argument("--output", help="Also write the results table to this file")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON lines instead of a table")
+    parser.add_argument("--verbose", action="store_true", help="Print the messages plugins send through provider.io")
+    args = parser.parse_args()
+
+    scenarios = [
+        {
+            "tool": tool,
+            "rows": rows,
+            "batch_size": batch_size,
+            "latency": args.latency,
+            "error_rate": args.error_rate,
+            "rows_per_response": args.rows_per_response,
+            "overrides": parse_overrides(args.overrides),
+            "verbose": args.verbose,
+        }
+        for tool in args.tools
+        for rows in (args.rows or TOOLS[tool]["rows"])
+        for batch_size in args.batch_sizes
+    ]
+
+    # A fresh process per scenario keeps peak RSS and module state independent
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for scenario in scenarios:
+        with context.Pool(1) as pool:
+            result = pool.apply(run_scenario, (scenario,))
+        results.append(result)
+        if args.json:
+            print(json.dumps(result))
+
+    report = format_results(results)
+    if not args.json:
+        print(report)
+    if args.output:
+        Path(args.output).write_text(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""Stub Bedrock, S3 and Google Custom Search backends with configurable latency and error rates."""
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, unquote, urlparse
+
+
+class StubThrottlingException(Exception):
+    """Looks like the botocore ClientError raised when Bedrock throttles a request."""
+
+    def __init__(self):
+        super().__init__("An error occurred (ThrottlingException) when calling the InvokeModel operation: Too many requests")
+        self.response = {"Error": {"Code": "ThrottlingException", "Message": "Too many requests"}}
+
+
+class StubBody:
+    """Mimics the streaming body returned by invoke_model."""
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+    def read(self) -> bytes:
+        return self.data
+
+
+class StubBedrockClient:
+    """
+    Stand-in for a boto3 bedrock-runtime client.
+
+    Every call sleeps for `latency` seconds and fails with a throttling error at `error_rate`.
+    Successful calls return `rows_per_response` JSON rows in the Anthropic messages format.
+    Micro-batch prompts get that many rows per `_row_id`, leaving each ID out at `missing_rate`.
+    """
+
+    def __init__(self, latency: float = 0.05, error_rate: float = 0.0, rows_per_response: int = 5, seed: int = 0,
+                 missing_rate: float = 0.0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rows_per_response = rows_per_response
+        self.missing_rate = missing_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.cached_prefixes = set()
+
+    def _usage(self, body: bytes, text: str) -> dict:
+        """Token usage for a request, reporting prompt cache reads and writes for content marked with cache_control."""
+        usage = {"input_tokens": len(body) // 4, "output_tokens": len(text) // 4}
+        content = json.loads(body)["messages"][0]["content"]
+        if len(content) > 1 and "cache_control" in content[0]:
+            prefix = content[0]["text"]
+            with self.lock:
+                cached = prefix in self.cached_prefixes
+                self.cached_prefixes.add(prefix)
+            usage["input_tokens"] -= len(prefix) // 4
+            usage["cache_read_input_tokens" if cached else "cache_creation_input_tokens"] = len(prefix) // 4
+        return usage
+
+    def _start_call(self) -> None:
+        with self.lock:
+            self.calls += 1
+            failed = self.random.random() < self.error_rate
+            if failed:
+                self.errors += 1
+        time.sleep(self.latency)
+        if failed:
+            raise StubThrottlingException()
+
+    def _response_text(self, body: bytes) -> str:
+        rows = [{"row": i, "label": f"label {i}", "score": i / 10} for i in range(self.rows_per_response)]
+        content = json.loads(body)["messages"][0]["content"]
+        prompt = "".join(block.get("text", "") for block in content) if isinstance(content, list) else content
+        row_ids = [int(row_id) for row_id in re.findall(r'"_row_id":(\d+)', prompt)]
+        if row_ids:
+            with self.lock:
+                row_ids = [row_id for row_id in row_ids if self.random.random() >= self.missing_rate]
+            rows = [dict(row, _row_id=row_id) for row_id in row_ids for row in rows]
+        return json.dumps(rows)
+
+    def invoke_model(self, modelId: str, body: bytes, accept: str = None, contentType: str = None, **kwargs) -> dict:
+        self._start_call()
+        text = self._response_text(body)
+        result = {
+            "content": [{"type": "text", "text": text}],
+            "usage": self._usage(body, text),
+        }
+        return {"body": StubBody(json.dumps(result).encode("utf-8"))}
+
+    def invoke_model_with_response_stream(self, modelId: str, body: bytes, accept: str = None, contentType: str = None, **kwargs) -> dict:
+        self._start_call()
+        text = self._response_text(body)
+
+        usage = self._usage(body, text)
+
+        def events():
+            yield self._event({"type": "message_start", "message": {"usage": {
+                key: value for key, value in usage.items() if key != "output_tokens"
+            }}})
+            for i in range(0, len(text), 20):
+                yield self._event({"type": "content_block_delta", "delta": {"type": "text_delta", "text": text[i:i + 20]}})
+            yield self._event({"type": "message_delta", "usage": {"output_tokens": usage["output_tokens"]}})
+            yield self._event({"type": "message_stop"})
+
+        return {"body": events()}
+
+    @staticmethod
+    def _event(message: dict) -> dict:
+        return {"chunk": {"bytes": json.dumps(message).encode("utf-8")}}
+
+
+class StubS3Client:
+    """In-memory stand-in for the boto3 S3 client calls used by Bedrock batch mode."""
+
+    def __init__(self):
+        self.objects = {}
+
+    def put_object(self, Bucket: str, Key: str, Body, **kwargs) -> dict:
+        self.objects[(Bucket, Key)] = Body.encode("utf-8") if isinstance(Body, str) else Body
+        return {}
+
+    def get_object(self, Bucket: str, Key: str, **kwargs) -> dict:
+        return {"Body": StubBody(self.objects[(Bucket, Key)])}
+
+    def get_paginator(self, operation_name: str) -> "StubS3Client":
+        return self
+
+    def paginate(self, Bucket: str, Prefix: str = "", **kwargs):
+        keys = sorted(key for bucket, key in self.objects if bucket == Bucket and key.startswith(Prefix))
+        yield {"Contents": [{"Key": key, "Size": len(self.objects[(Bucket, key)])} for key in keys]}
+
+
+class StubBedrockBatchClient:
+    """
+    Stand-in for the boto3 bedrock client's batch inference calls.
+
+    A job reports InProgress until `duration` seconds have passed, then writes one output record per
+    input record to the stub S3 client using `runtime` to produce each model output.
+    """
+
+    def __init__(self, s3: StubS3Client, runtime: StubBedrockClient, duration: float = 1.0):
+        self.s3 = s3
+        self.runtime = runtime
+        self.duration = duration
+        self.jobs = {}
+
+    @staticmethod
+    def _split_uri(uri: str) -> tuple:
+        parsed = urlparse(uri)
+        return parsed.netloc, parsed.path.lstrip("/")
+
+    def create_model_invocation_job(self, jobName: str, roleArn: str, modelId: str, inputDataConfig: dict,
+                                    outputDataConfig: dict, **kwargs) -> dict:
+        job_arn = f"arn:aws:bedrock:us-east-1:000000000000:model-invocation-job/{jobName}"
+        self.jobs[job_arn] = {
+            "input": self._split_uri(inputDataConfig["s3InputDataConfig"]["s3Uri"]),
+            "output": self._split_uri(outputDataConfig["s3OutputDataConfig"]["s3Uri"]),
+            "modelId": modelId,
+            "finish_time": time.monotonic() + self.duration,
+            "status": "InProgress",
+        }
+        return {"jobArn": job_arn}
+
+    def get_model_invocation_job(self, jobIdentifier: str, **kwargs) -> dict:
+        job = self.jobs[jobIdentifier]
+        if job["status"] == "InProgress" and time.monotonic() >= job["finish_time"]:
+            self._write_output(job)
+            job["status"] = "Completed"
+        return {"jobArn": jobIdentifier, "status": job["status"]}
+
+    def _write_output(self, job: dict) -> None:
+        bucket, key = job["input"]
+        lines = []
+        for line in self.s3.objects[(bucket, key)].decode("utf-8").splitlines():
+            record = json.loads(line)
+            body = json.dumps(record["modelInput"]).encode("utf-8")
+            response = self.runtime.invoke_model(modelId=job["modelId"], body=body)
+            record["modelOutput"] = json.loads(response["body"].read())
+            lines.append(json.dumps(record))
+        out_bucket, out_prefix = job["output"]
+        self.s3.put_object(Bucket=out_bucket, Key=f"{out_prefix}{key.rsplit('/', 1)[-1]}.out", Body="\n".join(lines))
+        self.s3.put_object(Bucket=out_bucket, Key=f"{out_prefix}manifest.json.out", Body=json.dumps({"totalRecordCount": len(lines)}))
+
+
+class StubSearchServer:
+    """
+    Local HTTP server answering Custom Search API requests.
+
+    Result links point back at the server, which serves an HTML page for each one under /page/.
+    Each request sleeps for `latency` seconds and returns HTTP 429 at `error_rate`.
+    Start it with `with StubSearchServer() as server:` and point the tool at `server.url`.
+    """
+
+    def __init__(self, latency: float = 0.05, error_rate: float = 0.0, total_results: int = 100, seed: int = 0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.total_results = total_results
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"{self.base_url}/customsearch/v1"
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def __enter__(self) -> "StubSearchServer":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                params = {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+                with stub.lock:
+                    stub.requests += 1
+                    failed = stub.random.random() < stub.error_rate
+                time.sleep(stub.latency)
+                if failed:
+                    self._send(429, {"error": {"code": 429, "message": "Rate Limit Exceeded"}})
+                elif self.path.startswith("/page/"):
+                    self._send(200, stub.page_response(urlparse(self.path).path), "text/html; charset=utf-8")
+                else:
+                    self._send(200, stub.search_response(params))
+
+            def _send(self, status: int, data, content_type: str = "application/json") -> None:
+                body = (data if isinstance(data, str) else json.dumps(data)).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args) -> None:
+                pass
+
+        return Handler
+
+    def page_response(self, path: str) -> str:
+        """An HTML landing page with navigation and a script around its main content."""
+        page = unquote(path[len("/page/"):])
+        paragraphs = "".join(f"<p>Paragraph {i} of page {page} with some body text.</p>" for i in range(20))
+        return (
+            f"<html><head><title>Page {page}</title><script>var tracking = 1;</script></head><body>"
+            f"<nav><a href=\"/\">Home</a></nav><main><h1>Page {page}</h1>{paragraphs}</main>"
+            "<footer>Copyright</footer></body></html>"
+        )
+
+    def search_response(self, params: dict) -> dict:
+        query = params.get("q", "")
+        num = int(params.get("num", 10))
+        start = int(params.get("start", 1))
+        end = min(start + num - 1, self.total_results)
+        items = [
+            {
+                "title": f"{query} result {rank}",
+                "snippet": f"Snippet for {query} result {rank}.",
+                "link": f"{self.base_url}/page/{quote(query)}/{rank}",
+                "displayLink": "example.com",
+                "formattedUrl": f"https://example.com/{rank}",
+            }
+            for rank in range(start, end + 1)
+        ]
+        data = {
+            "searchInformation": {"totalResults": str(self.total_results)},
+            "queries": {"request": [{"startIndex": start, "count": len(items)}]},
+            "items": items,
+        }
+        if end < self.total_results:
+            data["queries"]["nextPage"] = [{"startIndex": end + 1, "count": num}]
+        return data
@@ -15,12 +15,17 @@
 from typing import TYPE_CHECKING
 import pyarrow as pa
 
-import boto3 # For AWS Bedrock - !!! this needs to be pip installed directly in the Tool's site packages folder !!!
-# Run command: `pip install boto3 -t "C:\Path\To\Your\Tool\site-packages"` e.g. `C:\Users\<USER>\AppData\Roaming\Alteryx\Tools\<TOOL_NAME>_1_0\site-packages`
-
-import re # For cleaning AWS Bedrock response
+import re # For parsing AWS Bedrock response
 import traceback # For debugging
 import json
+import os
+import random
+import time
+import hashlib
+import sqlite3 # For the local response cache
+import tempfile
+import threading
+from datetime import datetime
 
 from ayx_python_sdk.core import (
     Anchor,
@@ -29,6 +34,560 @@ from ayx_python_sdk.core import (
 
 from ayx_python_sdk.providers.amp_provider.amp_provider_v2 import AMPProviderV2
 
+MODEL_ID = "us.anthropic.claude-3-5-sonnet-20241022-v2:0" # CHANGE MODEL HERE
+STREAM_FLUSH_ROWS = 100 # Rows to collect before writing a streamed batch to the output anchor
+STREAM_HOLD_ROWS = 1000 # Most rows to hold back while waiting for every column of the first batch to have a value
+
+# How each prompt format is introduced to the model
+PROMPT_FORMATS = {
+    "json": "The following JSON array represents tabular data",
+    "jsonl": (
+        "The following JSON lines represent tabular data. The first line lists the column names "
+        "and each following line is one row's values in the same order"
+    ),
+    "csv": "The following CSV represents tabular data, with a header row",
+    "tsv": "The following tab-separated values represent tabular data, with a header row",
+    "columnar": "The following JSON object represents tabular data, mapping each column name to its list of values",
+}
+COMPACT_SEPARATORS = (",", ":")
+
+def serialize_table(table: "pa.Table", prompt_format: str) -> str:
+    """
+    Serialize an Arrow table compactly for a prompt.
+
+    CSV and TSV are written by Arrow directly. The JSON formats convert one record batch at a
+    time, and "jsonl" / "columnar" only write the column names once.
+    """
+    if prompt_format in ("csv", "tsv"):
+        import pyarrow.csv as pa_csv # Only loaded when a CSV format is selected
+
+        sink = pa.BufferOutputStream()
+        options = pa_csv.WriteOptions(delimiter="\t" if prompt_format == "tsv" else ",")
+        pa_csv.write_csv(table, sink, write_options=options)
+        return sink.getvalue().to_pybytes().decode("utf-8")
+
+    if prompt_format == "columnar":
+        columns = {name: table.column(name).to_pylist() for name in table.column_names}
+        return json.dumps(columns, separators=COMPACT_SEPARATORS, default=str)
+
+    if prompt_format == "jsonl":
+        lines = [json.dumps(table.column_names, separators=COMPACT_SEPARATORS)]
+        for batch in table.to_batches():
+            values = [column.to_pylist() for column in batch.columns]
+            lines.extend(json.dumps(list(row), separators=COMPACT_SEPARATORS, default=str) for row in zip(*values))
+        return "\n".join(lines)
+
+    rows = []
+    for batch in table.to_batches():
+        rows.extend(json.dumps(row, separators=COMPACT_SEPARATORS, default=str) for row in batch.to_pylist())
+    return "[" + ",".join(rows) + "]"
+
+# boto3 clients shared by every tool instance in this process, keyed by service, region and credentials
+CLIENTS = {}
+CLIENTS_LOCK = threading.Lock()
+
+def get_client(service_name: str, region: str, access_key: str, secret_key: str, session_token: str = None,
+               max_attempts: int = None, max_pool_connections: int = None):
+    """
+    Return a boto3 client, creating it on first use and reusing it for later calls with the same settings.
+
+    boto3 is imported here rather than at the top of the file. Importing it and building a client is
+    slow, and neither is needed when Designer only loads the tool to validate or update its configuration.
+    `max_attempts` counts the first request too, so 1 turns botocore's own retries off.
+    `max_pool_connections` should cover every request sent at once on the client (botocore's default is 10).
+    """
+    key = (service_name, region, access_key, secret_key, session_token, max_attempts, max_pool_connections)
+    with CLIENTS_LOCK:
+        if key not in CLIENTS:
+            import boto3 # For AWS Bedrock - !!! this needs to be pip installed directly in the Tool's site packages folder !!!
+            # Run command: `pip install boto3 -t "C:\Path\To\Your\Tool\site-packages"` e.g. `C:\Users\<USER>\AppData\Roaming\Alteryx\Tools\<TOOL_NAME>_1_0\site-packages`
+            from botocore.config import Config
+
+            credentials = {
+                "aws_access_key_id": access_key,
+                "aws_secret_access_key": secret_key,
+            }
+            if session_token:
+                credentials["aws_session_token"] = session_token
+
+            config = {}
+            if max_attempts is not None:
+                config["retries"] = {"total_max_attempts": max_attempts}
+            if max_pool_connections is not None:
+                config["max_pool_connections"] = max_pool_connections
+
+            CLIENTS[key] = boto3.client(
+                service_name=service_name,
+                region_name=region,
+                config=Config(**config) if config else None,
+                **credentials
+            )
+        return CLIENTS[key]
+
+# Characters that change the parser state inside a JSON string and between JSON tokens
+STRING_SPECIALS = re.compile(r'["\\]')
+STRUCTURE_SPECIALS = re.compile(r'[{}\[\]",]')
+
+class JsonRowParser:
+    """
+    Single-pass parser that pulls JSON objects out of model output text.
+
+    Text can be fed in pieces and each outermost object is returned as soon as it closes,
+    however deeply it is nested. Trailing commas are dropped and anything outside an object
+    (array brackets, commentary) is skipped. Objects that still fail to load are counted in
+    `malformed` instead of stopping the parse.
+    """
+
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.pending_comma = None # Comma (and following whitespace) held until we know it isn't trailing
+        self.buffer = []
+        self.malformed = 0
+
+    def feed(self, text: str) -> list:
+        """Parse the next piece of text and return the objects completed by it."""
+        rows = []
+        pos = 0
+        end = len(text)
+        while pos < end:
+            if self.depth == 0:
+                # Skip to the start of the next object
+                start = text.find("{", pos)
+                if start == -1:
+                    break
+                self.depth = 1
+                self.buffer = ["{"]
+                pos = start + 1
+            elif self.in_string:
+                if self.escaped:
+                    self.buffer.append(text[pos])
+                    self.escaped = False
+                    pos += 1
+                    continue
+                match = STRING_SPECIALS.search(text, pos)
+                if match is None:
+                    self.buffer.append(text[pos:])
+                    break
+                i = match.start()
+                self.buffer.append(text[pos:i + 1])
+                pos = i + 1
+                if text[i] == "\\":
+                    self.escaped = True
+                else:
+                    self.in_string = False
+            else:
+                match = STRUCTURE_SPECIALS.search(text, pos)
+                i = match.start() if match else end
+                chunk = text[pos:i]
+
+                if self.pending_comma is not None:
+                    if chunk.strip():
+                        self.buffer.append(self.pending_comma)
+                        self.buffer.append(chunk)
+                        self.pending_comma = None
+                    else:
+                        self.pending_comma += chunk
+                        if match is not None:
+                            if text[i] not in "}]":
+                                self.buffer.append(self.pending_comma)
+                            self.pending_comma = None
+                else:
+                    self.buffer.append(chunk)
+
+                if match is None:
+                    break
+                pos = i + 1
+                char = text[i]
+                if char == ",":
+                    self.pending_comma = ","
+                    continue
+
+                self.buffer.append(char)
+                if char == '"':
+                    self.in_string = True
+                elif char == "{":
+                    self.depth += 1
+                elif char == "}":
+                    self.depth -= 1
+                    if self.depth == 0:
+                        self.load_object(rows)
+        return rows
+
+    def load_object(self, rows: list) -> None:
+        """Load the buffered object text and add it to rows."""
+        fragment = "".join(self.buffer)
+        self.buffer = []
+        try:
+            parsed_obj = json.loads(fragment)
+        except ValueError:
+            self.malformed += 1
+            return
+        if isinstance(parsed_obj, dict):
+            rows.append(parsed_obj)
+        else:
+            self.malformed += 1
+
+    def close(self) -> None:
+        """Finish parsing, counting an unterminated object as malformed."""
+        if self.depth > 0:
+            self.malformed += 1
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.pending_comma = None
+        self.buffer = []
+
+# Bedrock errors worth retrying, and the subset that means we are sending too fast
+RETRYABLE_ERROR_CODES = {
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "ServiceUnavailableException",
+    "InternalServerException",
+    "ModelNotReadyException",
+    "ModelTimeoutException",
+}
+THROTTLING_ERROR_CODES = {"ThrottlingException", "TooManyRequestsException"}
+RETRYABLE_CONNECTION_ERRORS = {"EndpointConnectionError", "ConnectionClosedError", "ReadTimeoutError", "ConnectTimeoutError"}
+BACKOFF_BASE_SECONDS = 1
+BACKOFF_MAX_SECONDS = 60
+
+def get_error_code(error: Exception) -> str:
+    """Get the AWS error code from a botocore ClientError (empty for other errors)."""
+    response = getattr(error, "response", None)
+    if isinstance(response, dict):
+        return response.get("Error", {}).get("Code", "")
+    return ""
+
+def is_retryable(error: Exception) -> bool:
+    """Check whether a failed Bedrock call is worth retrying."""
+    return get_error_code(error) in RETRYABLE_ERROR_CODES or type(error).__name__ in RETRYABLE_CONNECTION_ERRORS
+
+class AdaptiveLimiter:
+    """
+    Limits the number of Bedrock calls in flight, adjusting the limit AIMD-style.
+
+    The limit halves when a call is throttled (at most once per cooldown, so one burst of
+    throttles only counts once) and grows by one after a full limit's worth of successful calls.
+    """
+
+    def __init__(self, max_limit: int, cooldown_seconds: float = 1.0):
+        self.max_limit = max_limit
+        self.limit = max_limit
+        self.cooldown_seconds = cooldown_seconds
+        self.in_flight = 0
+        self.successes = 0
+        self.last_decrease = 0.0
+        self.condition = threading.Condition()
+
+    def acquire(self) -> None:
+        """Block until another call is allowed."""
+        with self.condition:
+            while self.in_flight >= self.limit:
+                self.condition.wait()
+            self.in_flight += 1
+
+    def release(self, throttled: bool = False) -> None:
+        """Finish a call and adjust the limit based on whether it was throttled."""
+        with self.condition:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if throttled:
+                if now - self.last_decrease >= self.cooldown_seconds:
+                    self.limit = max(1, self.limit // 2)
+                    self.last_decrease = now
+                self.successes = 0
+            else:
+                self.successes += 1
+                if self.successes >= self.limit and self.limit < self.max_limit:
+                    self.limit += 1
+                    self.successes = 0
+            self.condition.notify_all()
+
+# Columns of the optional "Metrics" output, one row per Bedrock call
+METRICS_SCHEMA = pa.schema([
+    ("call", pa.int64()),
+    ("model_id", pa.string()),
+    ("status", pa.string()),
+    ("cache_hit", pa.bool_()),
+    ("retries", pa.int64()),
+    ("latency_ms", pa.float64()),
+    ("first_token_ms", pa.float64()),
+    ("input_tokens", pa.int64()),
+    ("output_tokens", pa.int64()),
+])
+
+class RunMetrics:
+    """Thread-safe per-call record of Bedrock latency, token usage, retries and cache hits for one run."""
+
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+        self.start = time.perf_counter()
+
+    def record(self, model_id: str, status: str, start: float, usage: dict = None, retries: int = None,
+               cache_hit: bool = False, first_token: float = None) -> None:
+        """Record one call, timed from its perf_counter start time."""
+        now = time.perf_counter()
+        usage = usage or {}
+        with self.lock:
+            self.calls.append({
+                "call": len(self.calls) + 1,
+                "model_id": model_id,
+                "status": status,
+                "cache_hit": cache_hit,
+                "retries": retries,
+                "latency_ms": (now - start) * 1000,
+                "first_token_ms": (first_token - start) * 1000 if first_token else None,
+                "input_tokens": usage.get("input_tokens"),
+                "output_tokens": usage.get("output_tokens"),
+            })
+
+    def to_table(self) -> "pa.Table":
+        with self.lock:
+            return pa.Table.from_pylist(self.calls, schema=METRICS_SCHEMA)
+
+    @staticmethod
+    def percentile(values: list, fraction: float) -> float:
+        """Nearest-rank percentile of a list of numbers."""
+        if not values:
+            return 0.0
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+    def summary(self) -> str:
+        """Describe the run's calls, latency percentiles and token throughput in one line."""
+        with self.lock:
+            calls = list(self.calls)
+        elapsed = time.perf_counter() - self.start
+        latencies = [call["latency_ms"] for call in calls if call["status"] == "ok"]
+        input_tokens = sum(call["input_tokens"] or 0 for call in calls if not call["cache_hit"])
+        output_tokens = sum(call["output_tokens"] or 0 for call in calls if not call["cache_hit"])
+        return (
+            f"Bedrock calls: {len(calls)} "
+            f"({sum(call['cache_hit'] for call in calls)} cached, "
+            f"{sum(call['status'] == 'error' for call in calls)} failed, "
+            f"{sum(call['retries'] or 0 for call in calls)} retries). "
+            f"Latency p50 {self.percentile(latencies, 0.5):.0f} ms, p95 {self.percentile(latencies, 0.95):.0f} ms. "
+            f"Tokens: {input_tokens} in, {output_tokens} out, "
+            f"{output_tokens / elapsed if elapsed else 0:.1f} output tokens/sec."
+        )
+
+class ResponseCache:
+    """SQLite cache of API responses with a time-to-live and least-recently-used size limit."""
+
+    def __init__(self, path: str, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self.lock, self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT, created REAL, accessed REAL)"
+            )
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """Hash the request parameters into a cache key."""
+        return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        """Return the cached value for a key, or None if it is missing or expired."""
+        now = time.time()
+        with self.lock, self.connection:
+            row = self.connection.execute("SELECT value, created FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                self.misses += 1
+                return None
+            self.connection.execute("UPDATE cache SET accessed = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value) -> None:
+        """Store a value in the cache."""
+        now = time.time()
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO cache (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now)
+            )
+
+    def close(self) -> None:
+        """Drop expired entries, evict the least recently used entries over the size limit and close."""
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM cache WHERE created < ?", (time.time() - self.ttl_seconds,))
+            self.connection.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+        self.connection.close()
+
+class SpillBuffer:
+    """
+    Buffers incoming batches as Arrow data, spilling them to a temporary Arrow IPC file past a memory limit.
+
+    Batches stay in memory until they use more than `max_bytes`. They are then written to the spill
+    file and dropped from memory. The spill file is memory-mapped when read back, so the data is only
+    paged in as it is used and reading a subset of columns only touches those columns.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.tables = []
+        self.schema = None
+        self.buffered_bytes = 0
+        self.num_rows = 0
+        self.num_batches = 0
+        self.spill_path = None
+        self.writer = None
+        self.source = None
+
+    def __bool__(self) -> bool:
+        return self.num_batches > 0
+
+    def append(self, table: "pa.Table") -> None:
+        """Add a batch, spilling everything buffered so far if it goes over the memory limit."""
+        if self.schema is None:
+            self.schema = table.schema
+        self.tables.append(table)
+        self.buffered_bytes += table.nbytes
+        self.num_rows += table.num_rows
+        self.num_batches += 1
+        if self.buffered_bytes > self.max_bytes:
+            self.spill()
+
+    def spill(self) -> None:
+        """Write the in-memory batches to the spill file and release them."""
+        if self.writer is None:
+            fd, self.spill_path = tempfile.mkstemp(prefix="alteryx_input_", suffix=".arrow")
+            os.close(fd)
+            self.writer = pa.ipc.new_file(self.spill_path, self.schema)
+        for table in self.tables:
+            self.writer.write_table(table)
+        self.tables = []
+        self.buffered_bytes = 0
+
+    def iter_batches(self, columns: list = None):
+        """Yield the buffered data as record batches in arrival order, keeping only `columns` (names or indices) if given."""
+        if self.spill_path:
+            if self.writer is not None:
+                self.writer.close()
+                self.writer = None
+            if self.source is None:
+                self.source = pa.memory_map(self.spill_path)
+            reader = pa.ipc.open_file(self.source)
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i)
+                yield batch.select(columns) if columns is not None else batch
+        for table in self.tables:
+            for batch in table.to_batches():
+                yield batch.select(columns) if columns is not None else batch
+
+    def read_table(self, columns: list = None) -> "pa.Table":
+        """Read the buffered data as one table. Spilled batches are memory-mapped rather than copied."""
+        batches = list(self.iter_batches(columns))
+        if not batches:
+            empty_table = self.schema.empty_table()
+            return empty_table.select(columns) if columns is not None else empty_table
+        return pa.Table.from_batches(batches)
+
+    def close(self) -> None:
+        """Release the buffered batches and delete the spill file."""
+        self.tables = []
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        if self.source is not None:
+            self.source.close()
+            self.source = None
+        if self.spill_path:
+            try:
+                os.remove(self.spill_path)
+            except OSError:
+                pass # Still mapped by a table in use (Windows) - it is left in the temp folder
+            self.spill_path = None
+
+LOG_LEVELS = {"debug": 10, "info": 20, "warn": 30, "error": 40}
+
+class ToolLogger:
+    """
+    Sends the tool's messages to Designer through provider.io, filtered by log level.
+
+    Prompt and response payloads are debug messages cut to `truncate` characters, and per-row
+    messages are only sent for 1 in every `sample_rate` rows. When a trace file is set, every
+    payload is also written to it in full, so large dumps stay out of the AMP message channel.
+    """
+
+    def __init__(self, io, level: str = "info", truncate: int = 500, sample_rate: int = 100, trace_path: str = None):
+        self.io = io
+        if level not in LOG_LEVELS:
+            io.warn(f"Unknown log level '{level}' - defaulting to info.")
+        self.level = LOG_LEVELS.get(level, LOG_LEVELS["info"])
+        self.truncate = truncate
+        self.sample_rate = sample_rate
+        self.samples = 0
+        self.lock = threading.Lock()
+        self.trace_file = None
+        if trace_path:
+            try:
+                self.trace_file = open(trace_path, "a", encoding="utf-8")
+            except OSError as e:
+                io.warn(f"Could not open trace file {trace_path}: {e}")
+
+    def debug(self, message: str) -> None:
+        if self.level <= LOG_LEVELS["debug"]:
+            self.io.info(message)
+
+    def info(self, message: str) -> None:
+        if self.level <= LOG_LEVELS["info"]:
+            self.io.info(message)
+
+    def warn(self, message: str) -> None:
+        if self.level <= LOG_LEVELS["warn"]:
+            self.io.warn(message)
+
+    def error(self, message: str) -> None:
+        self.io.error(message)
+
+    def shorten(self, text: str) -> str:
+        """Cut text to the truncation length, noting how much was left out."""
+        if len(text) <= self.truncate:
+            return text
+        return f"{text[:self.truncate]}... ({len(text) - self.truncate} more characters)"
+
+    def payload(self, label: str, value) -> None:
+        """
+        Log a prompt, response or other large value.
+
+        It is only converted to text if it will be used: a truncated copy is sent at debug level
+        and the full text goes to the trace file.
+        """
+        if self.level > LOG_LEVELS["debug"] and not self.trace_file:
+            return
+        text = value if isinstance(value, str) else str(value)
+        self.debug(f"{label}: {self.shorten(text)}")
+        if self.trace_file:
+            with self.lock:
+                self.trace_file.write(f"{datetime.now().isoformat()} {label}\n{text}\n\n")
+
+    def sampled(self, label: str, value) -> None:
+        """Log a per-row debug message for only 1 in every sample_rate calls."""
+        if self.level > LOG_LEVELS["debug"]:
+            return
+        with self.lock:
+            self.samples += 1
+            send = (self.samples - 1) % self.sample_rate == 0
+        if send:
+            self.io.info(self.shorten(f"{label}: {value}"))
+
+    def close(self) -> None:
+        if self.trace_file:
+            self.trace_file.close()
+            self.trace_file = None
+
 class BedrockInferenceTool(PluginV2):
     """A sample Plugin that passes data from an input connection to an output connection."""
 
@@ -36,7 +595,16 @@ class BedrockInferenceTool(PluginV2):
         """Construct the plugin."""
         self.name = "BedrockInferenceTool"
         self.provider = provider
-        self.batches = []
+
+        # Diagnostic logging - payloads are debug messages, optionally written in full to a trace file
+        self.log = ToolLogger(
+            provider.io,
+            provider.tool_config.get("logLevel", "info"),
+            self.get_int_config("logTruncate", 500),
+            self.get_int_config("logSampleRate", 100),
+            provider.tool_config.get("traceFile") or None,
+        )
+        self.input_buffer = SpillBuffer(self.get_int_config("spillThresholdMB", 256) * 1024 * 1024) # Spilled to disk past this size
 
         self.access_key = provider.tool_config.get("accessKeyID")
         self.secret_key = provider.tool_config.get("secretAccessKey")
@@ -44,27 +612,39 @@ class BedrockInferenceTool(PluginV2):
         self.region = "us-east-1"
         self.prompt_template = provider.tool_config.get("promptText") # Get prompt template from text box
         self.output_type = provider.tool_config.get("outputType", "analysis")
+        self.prompt_format = provider.tool_config.get("promptFormat", "json") # How the input table is written in the prompt
+        if self.prompt_format not in PROMPT_FORMATS:
+            self.log.warn(f"Unknown prompt format '{self.prompt_format}' - defaulting to json.")
+            self.prompt_format = "json"
+        self.stream_response = str(provider.tool_config.get("streamResponse", False)).lower() == "true" # Table output only
 
-        # Setup boto3 Bedrock client
-        if self.session_token:
-            # With session token
-            self.bedrock_client = boto3.client( 
-                service_name="bedrock-runtime",
-                region_name=self.region,
-                aws_access_key_id=self.access_key,
-                aws_secret_access_key=self.secret_key,
-                aws_session_token=self.session_token
-            )
-        else:
-            # Without session token
-            self.bedrock_client = boto3.client(
-                service_name="bedrock-runtime",
-                region_name=self.region,
-                aws_access_key_id=self.access_key,
-                aws_secret_access_key=self.secret_key,
-            )
+        # Output state for streaming mode, where rows are written in batches as they arrive
+        self.pending_rows = []
+        self.output_schema = None
+        self.rows_written = 0
+
+        # Optional local cache of model responses, shared by both Bedrock tools
+        self.cache = None
+        if str(provider.tool_config.get("useCache", False)).lower() == "true":
+            cache_path = provider.tool_config.get("cachePath") or os.path.join(tempfile.gettempdir(), "alteryx_bedrock_cache.sqlite")
+            cache_ttl_hours = self.get_int_config("cacheTtlHours", 24)
+            cache_max_entries = self.get_int_config("cacheMaxEntries", 10000)
+            try:
+                self.cache = ResponseCache(cache_path, cache_ttl_hours * 3600, cache_max_entries)
+            except sqlite3.Error as e:
+                self.log.warn(f"Could not open response cache at {cache_path}: {e}")
+
+        # Per-call latency and token usage, optionally written to the "Metrics" anchor
+        self.metrics = RunMetrics()
+        self.metrics_output = str(provider.tool_config.get("metricsOutput", False)).lower() == "true"
 
-        self.provider.io.info(f"{self.name} tool started")
+        # Retry throttled and failed calls, lowering the calls in flight while throttled
+        self.max_retries = self.get_int_config("maxRetries", 5)
+        self.limiter = AdaptiveLimiter(1)
+
+        # The boto3 Bedrock client is created on first use - see bedrock_client
+
+        self.log.info(f"{self.name} tool started")
 
     def on_record_batch(self, batch: "pa.Table", anchor: Anchor) -> None:
         """
@@ -82,7 +662,7 @@ class BedrockInferenceTool(PluginV2):
             A namedtuple('Anchor', ['name', 'connection']) containing input connection identifiers.
         """
 
-        self.batches.append(batch) # For AI table input
+        self.input_buffer.append(batch) # For AI table input
 
     def on_incoming_connection_complete(self, anchor: Anchor) -> None:
         """
@@ -95,19 +675,71 @@ class BedrockInferenceTool(PluginV2):
         anchor
             NamedTuple containing anchor.name and anchor.connection.
         """
-        self.provider.io.info(
+        self.log.info(
             f"Received complete update from {anchor.name}:{anchor.connection}."
         )
 
-    def analyse_with_bedrock(self, prompt: str) -> list:
-        native_request = {
-            "anthropic_version": "bedrock-2023-05-31",
-            "messages": [
-                {"role": "user", "content": [{"type": "text", "text": prompt}]}
-            ],
-            "max_tokens": 512, # CHANGE IF MORE TOKENS NEEDED
-            "temperature": 0.2
-        }
+    def create_client(self, service_name: str, max_attempts: int = None, max_pool_connections: int = None):
+        """Get a boto3 client for an AWS service using the tool's credentials."""
+        return get_client(service_name, self.region, self.access_key, self.secret_key, self.session_token, max_attempts,
+                          max_pool_connections)
+
+    @property
+    def bedrock_client(self):
+        """The bedrock-runtime client, created the first time a request is sent."""
+        return self.create_client("bedrock-runtime", max_attempts=1) # Retries are handled by call_with_retry
+
+    def get_int_config(self, key: str, default: int) -> int:
+        """Read a positive integer from the tool config, falling back to the default if invalid."""
+        value = self.provider.tool_config.get(key, default)
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            value = 0
+        if value < 1:
+            self.provider.io.warn(f"Invalid value for {key} - defaulting to {default}.")
+            return default
+        return value
+
+    def call_with_retry(self, call):
+        """
+        Run a Bedrock call within the concurrency limit, retrying errors that are worth retrying.
+
+        Retries use exponential backoff with full jitter. Throttling also lowers the number of
+        calls allowed in flight until calls start succeeding again.
+        Returns the call's result and the number of retries it took.
+        """
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            try:
+                result = call()
+            except Exception as e:
+                error_code = get_error_code(e)
+                self.limiter.release(throttled=error_code in THROTTLING_ERROR_CODES)
+                if attempt == self.max_retries or not is_retryable(e):
+                    raise
+                delay = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+                self.log.warn(
+                    f"Bedrock call failed ({error_code or type(e).__name__}) - "
+                    f"retry {attempt + 1} of {self.max_retries} in {delay:.1f}s."
+                )
+                time.sleep(delay)
+            else:
+                self.limiter.release()
+                return result, attempt
+
+    def invoke_bedrock(self, native_request: dict):
+        """Invoke the model, or return the cached response body for an identical request."""
+        model_id = MODEL_ID
+        start = time.perf_counter()
+
+        cache_key = None
+        if self.cache:
+            cache_key = ResponseCache.make_key(model_id, native_request)
+            result = self.cache.get(cache_key)
+            if result is not None:
+                self.metrics.record(model_id, "ok", start, result.get("usage"), cache_hit=True)
+                return result
 
         # Set up client and response
         bedrock = self.bedrock_client
@@ -115,59 +747,213 @@ class BedrockInferenceTool(PluginV2):
 
         try:
             # Invoke Bedrock model (Claude Sonnet 3.5 v2)
-            response = bedrock.invoke_model(
-                modelId="us.anthropic.claude-3-5-sonnet-20241022-v2:0", # CHANGE MODEL HERE
+            response, retries = self.call_with_retry(lambda: bedrock.invoke_model(
+                modelId=model_id,
                 body=request,
                 accept="application/json",
                 contentType="application/json"
-            )
+            ))
         except Exception as e:
-            self.provider.io.error(f"Error invoking model: {e}")
-            self.provider.io.error(traceback.format_exc())
-            return
+            self.metrics.record(model_id, "error", start)
+            self.log.error(f"Error invoking model: {e}")
+            self.log.error(traceback.format_exc())
+            return None
         
-        self.provider.io.info(f"Success response: {response}")
+        self.log.debug(f"Bedrock response metadata: {response.get('ResponseMetadata', {})}")
 
         try:
             result = json.loads(response['body'].read().decode('utf-8'))
-            self.provider.io.info(f"Bedrock response received: {result}")
+        except Exception as e:
+            self.metrics.record(model_id, "error", start, retries=retries)
+            self.log.error(f"Error reading model response: {e}")
+            return None
 
-            content = result.get("content", "")
+        self.metrics.record(model_id, "ok", start, result.get("usage"), retries=retries)
+        if self.cache:
+            self.cache.set(cache_key, result)
+        return result
 
-            if isinstance(content, list) and content and isinstance(content[0], dict) and 'text' in content[0]:
-                text = content[0]['text']
-            else:
-                text = content
+    def stream_bedrock(self, native_request: dict, on_text) -> bool:
+        """
+        Invoke the model with response streaming, passing each piece of generated text to on_text.
+
+        Identical requests are answered from the response cache when it is enabled.
+        Only starting the stream is retried, as rows from a stream that fails part-way may
+        already have been written. Returns False if the request failed.
+        """
+        model_id = MODEL_ID
+        start = time.perf_counter()
+
+        cache_key = None
+        if self.cache:
+            cache_key = ResponseCache.make_key(model_id, native_request)
+            result = self.cache.get(cache_key)
+            if result is not None:
+                self.metrics.record(model_id, "ok", start, result.get("usage"), cache_hit=True)
+                on_text(self.get_response_text(result))
+                return True
+
+        text_parts = []
+        usage = {}
+        retries = None
+        first_token = None
+        try:
+            response, retries = self.call_with_retry(lambda: self.bedrock_client.invoke_model_with_response_stream(
+                modelId=model_id,
+                body=json.dumps(native_request).encode('utf-8'),
+                accept="application/json",
+                contentType="application/json"
+            ))
+
+            for event in response["body"]:
+                chunk = event.get("chunk")
+                if not chunk:
+                    continue
+                message = json.loads(chunk["bytes"].decode('utf-8'))
+                if message.get("type") == "content_block_delta":
+                    text = message.get("delta", {}).get("text", "")
+                    if first_token is None:
+                        first_token = time.perf_counter()
+                    text_parts.append(text)
+                    on_text(text)
+                elif message.get("type") == "message_start":
+                    usage.update(message.get("message", {}).get("usage", {}))
+                elif message.get("type") == "message_delta":
+                    usage.update(message.get("usage", {}))
+        except Exception as e:
+            self.metrics.record(model_id, "error", start, usage, retries, first_token=first_token)
+            self.log.error(f"Error streaming model response: {e}")
+            self.log.error(traceback.format_exc())
+            return False
+
+        self.metrics.record(model_id, "ok", start, usage, retries, first_token=first_token)
+
+        # Store in the same shape as an invoke_model body so either mode can reuse it
+        if self.cache:
+            self.cache.set(cache_key, {"content": [{"type": "text", "text": "".join(text_parts)}], "usage": usage})
+        return True
+
+    def build_request(self, prompt: str) -> dict:
+        """Build the Anthropic messages request body for a prompt."""
+        return {
+            "anthropic_version": "bedrock-2023-05-31",
+            "messages": [
+                {"role": "user", "content": [{"type": "text", "text": prompt}]}
+            ],
+            "max_tokens": 512, # CHANGE IF MORE TOKENS NEEDED
+            "temperature": 0.2
+        }
+
+    def get_response_text(self, result: dict) -> str:
+        """Get the generated text out of a response body."""
+        content = result.get("content", "")
+
+        if isinstance(content, list) and content and isinstance(content[0], dict) and 'text' in content[0]:
+            return content[0]['text']
+        return str(content)
+
+    def analyse_with_bedrock(self, prompt: str) -> list:
+        result = self.invoke_bedrock(self.build_request(prompt))
+        if result is None:
+            return
+
+        try:
+            self.log.payload("Bedrock response", result)
+
+            text = self.get_response_text(result)
 
             if self.output_type == "analysis":
                 parsed = json.loads(text)
             else:
-                parsed = []
-
-                json_objects = re.findall(r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', str(text), re.DOTALL)
-
-                for obj_str in json_objects:
-                    try:
-                        # Clean up the JSON string
-                        cleaned_str = obj_str.strip()
-                        # Remove any trailing commas before closing braces
-                        cleaned_str = re.sub(r',\s*}', '}', cleaned_str)
-                        cleaned_str = re.sub(r',\s*]', ']', cleaned_str)
-                        
-                        parsed_obj = json.loads(cleaned_str)
-                        parsed.append(parsed_obj)
-                    except Exception as e:
-                        print(f"Error parsing JSON object: {e}")
-                        print(f"Problematic JSON string: {obj_str}")
-                        continue
+                parser = JsonRowParser()
+                parsed = parser.feed(str(text))
+                parser.close()
+                if parser.malformed:
+                    self.log.warn(f"Skipped {parser.malformed} malformed JSON objects in the model response.")
 
             return parsed
 
         except Exception as e:
-            self.provider.io.error(f"Error parsing model response: {e}")
-            self.provider.io.error(traceback.format_exc())
+            self.log.error(f"Error parsing model response: {e}")
+            self.log.error(traceback.format_exc())
             return
 
+    def stream_with_bedrock(self, prompt: str, on_rows) -> None:
+        """Stream a prompt's response from Bedrock, passing rows to on_rows as soon as each one is complete."""
+        parser = JsonRowParser()
+
+        def on_text(text: str) -> None:
+            rows = parser.feed(text)
+            if rows:
+                on_rows(rows)
+
+        self.stream_bedrock(self.build_request(prompt), on_text)
+        parser.close()
+        if parser.malformed:
+            self.log.warn(f"Skipped {parser.malformed} malformed JSON objects in the model response.")
+
+    def output_rows(self, rows: list) -> None:
+        """Add streamed rows to the output, writing a batch once enough rows have built up."""
+        self.pending_rows.extend(rows)
+        if len(self.pending_rows) >= STREAM_FLUSH_ROWS:
+            self.flush_output(final=False)
+
+    def flush_output(self, final: bool = True) -> None:
+        """
+        Write the pending streamed rows to the output anchor.
+
+        The first batch sets the output schema, which every later batch is converted to, so the
+        record layout never changes part-way through. Columns the model adds later are dropped
+        and missing ones are null. Rows that do not fit the schema are skipped and counted.
+        While a column has no values yet, the first batch is held back (up to STREAM_HOLD_ROWS rows)
+        so its type comes from real values. A column still without values is written as string.
+        """
+        if not self.pending_rows:
+            return
+        if self.output_schema is None and not final and len(self.pending_rows) < STREAM_HOLD_ROWS:
+            filled = {key for row in self.pending_rows for key, value in row.items() if value is not None}
+            if any(key not in filled for row in self.pending_rows for key in row):
+                return
+        rows, self.pending_rows = self.pending_rows, []
+        try:
+            output_table = self.rows_to_table(rows)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError) as e:
+            tables = []
+            for row in rows:
+                try:
+                    tables.append(self.rows_to_table([row]))
+                except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+                    pass
+            self.log.error(f"Skipped {len(rows) - len(tables)} rows that do not match the output schema: {e}")
+            if not tables:
+                return
+            output_table = pa.concat_tables(tables)
+        self.provider.write_to_anchor("Output", output_table)
+        self.rows_written += output_table.num_rows
+
+    def rows_to_table(self, rows: list) -> "pa.Table":
+        """Convert streamed rows to a table with the output schema, setting the schema from the first rows."""
+        if self.output_schema is not None:
+            return pa.Table.from_pylist(rows, schema=self.output_schema)
+        table = pa.Table.from_pylist(rows)
+        schema = pa.schema([field.with_type(pa.string()) if pa.types.is_null(field.type) else field for field in table.schema])
+        table = table.cast(schema)
+        self.output_schema = table.schema
+        return table
+
+    def free_resources(self) -> None:
+        """Report the run's metrics, log the cache hit rate and close the input buffer, response cache and trace file."""
+        self.input_buffer.close()
+        self.log.close()
+        if self.metrics.calls:
+            self.log.info(self.metrics.summary())
+        if self.metrics_output:
+            self.provider.write_to_anchor("Metrics", self.metrics.to_table())
+        if self.cache:
+            self.log.info(f"Response cache: {self.cache.hits} hits, {self.cache.misses} misses.")
+            self.cache.close()
+            self.cache = None
+
     def on_complete(self) -> None:
         """
         Clean up any plugin resources, or push records for an input tool.
@@ -183,34 +969,35 @@ class BedrockInferenceTool(PluginV2):
         """
         # Return errors if mandatory fields are not completed
         if not self.prompt_template:
-            self.provider.io.error("No prompt was provided.")
+            self.log.error("No prompt was provided.")
+            self.free_resources()
             return
         elif not self.access_key or not self.secret_key:
-            self.provider.io.error("Missing AWS credentials.")
+            self.log.error("Missing AWS credentials.")
+            self.free_resources()
             return
-            
-        # Combine all input batches into one table
-        if self.batches:
-            input_table = pa.concat_tables(self.batches)
-            input_rows = input_table.to_pylist()
-            input_json = json.dumps(input_rows, indent=2)
-            input_json = "{" + str(input_json.strip()) + "}"
-            self.provider.io.info(input_json)
+
+        # Combine all input batches into one table - spilled batches are memory-mapped, not copied
+        if self.input_buffer:
+            input_table = self.input_buffer.read_table()
+            input_data = serialize_table(input_table, self.prompt_format)
+            self.log.payload("Input data", input_data)
         else:
-            self.provider.io.error("No input data received.")
+            self.log.error("No input data received.")
+            self.free_resources()
             return
 
         # Set up prompt depending on output desired
         if self.output_type == "table":
             prompt = (
-                f"The following JSON array represents tabular data:\n{input_json}\n\n"
+                f"{PROMPT_FORMATS[self.prompt_format]}:\n{input_data}\n\n"
                 f"{self.prompt_template}\n\n"
                 "Please return a modified version of this data as a JSON array of objects. "
                 "Do not include explanations or formatting, ONLY the JSON array."
             )
         else:  # analysis prompt
             prompt = (
-                f"The following JSON array represents tabular data:\n{input_json}\n\n"
+                f"{PROMPT_FORMATS[self.prompt_format]}:\n{input_data}\n\n"
                 f"{self.prompt_template}\n\n"
                 f"Respond ONLY with a single JSON object, like this:\n"
                 f'{{"Insight": "your complete analysis here"}}\n'
@@ -218,18 +1005,29 @@ class BedrockInferenceTool(PluginV2):
             )
 
         
-        self.provider.io.info("Sending prompt to AWS Bedrock..." + prompt)
+        self.log.payload("Prompt", prompt)
+
+        if self.stream_response and self.output_type == "table":
+            self.stream_with_bedrock(prompt, self.output_rows)
+            self.flush_output()
+            self.free_resources()
+            if self.rows_written == 0:
+                self.log.warn("No rows were returned by the model.")
+            self.log.info(f"Streamed {self.rows_written} rows to the output.")
+            return
+
         parsed_data = self.analyse_with_bedrock(prompt)
+        self.free_resources()
         
         if not parsed_data:
             return
 
-        # self.provider.io.info(f"{type(parsed_data)} <- response type") # type displayed for debugging
+        # self.log.info(f"{type(parsed_data)} <- response type") # type displayed for debugging
 
         if self.output_type == "table" and isinstance(parsed_data, list) and all(isinstance(row, dict) for row in parsed_data):
                 output_table = pa.Table.from_pylist(parsed_data) # Output table from response
                 self.provider.write_to_anchor("Output", output_table)
-                self.provider.io.info("Output table written successfully.")
+                self.log.info("Output table written successfully.")
         elif self.output_type == "analysis" and isinstance(parsed_data, dict):
             insight_text = parsed_data["Insight"]
 
@@ -243,10 +1041,10 @@ class BedrockInferenceTool(PluginV2):
             # Create table with explicit schema
             insight_table = pa.Table.from_pydict({"Insight": [formatted_insight]}, schema=schema)
 
-            self.provider.io.info(f"Insight from AI: {insight_text}")
+            self.log.info(self.log.shorten(f"Insight from AI: {insight_text}"))
             # Write to Alteryx anchor (v2)
             self.provider.write_to_anchor("Output", insight_table)
-            self.provider.io.info("Output table written successfully.")
+            self.log.info("Output table written successfully.")
         else:
             raise ValueError("Unexpected format: AI output is not as expected.")
 
@@ -1,6 +1,6 @@
 import React, { useContext } from 'react';
 import ReactDOM from 'react-dom';
-import { AyxAppWrapper, Box, Typography, TextField, RadioGroup, Radio, FormControlLabel } from '@alteryx/ui';
+import { AyxAppWrapper, Box, Typography, TextField, RadioGroup, Radio, FormControlLabel, Checkbox } from '@alteryx/ui';
 import { Context as UiSdkContext, DesignerApi } from '@alteryx/react-comms';
 
 const App = () => {
@@ -36,6 +36,78 @@ const App = () => {
     handleUpdateModel(newModel);
   };
 
+  const handleUseCache = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.useCache = e.target.checked;
+    handleUpdateModel(newModel);
+  };
+
+  const handleCacheTtlHours = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.cacheTtlHours = e.target.value;
+    handleUpdateModel(newModel);
+  };
+
+  const handleCacheMaxEntries = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.cacheMaxEntries = e.target.value;
+    handleUpdateModel(newModel);
+  };
+
+  const handleStreamResponse = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.streamResponse = e.target.checked;
+    handleUpdateModel(newModel);
+  };
+
+  const handleSpillThresholdMB = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.spillThresholdMB = e.target.value;
+    handleUpdateModel(newModel);
+  };
+
+  const handleMaxRetries = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.maxRetries = e.target.value;
+    handleUpdateModel(newModel);
+  };
+
+  const handlePromptFormatChange = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.promptFormat = e.target.value;
+    handleUpdateModel(newModel);
+  };
+
+  const handleMetricsOutput = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.metricsOutput = e.target.checked;
+    handleUpdateModel(newModel);
+  };
+
+  const handleLogLevelChange = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.logLevel = e.target.value;
+    handleUpdateModel(newModel);
+  };
+
+  const handleLogTruncate = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.logTruncate = e.target.value;
+    handleUpdateModel(newModel);
+  };
+
+  const handleLogSampleRate = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.logSampleRate = e.target.value;
+    handleUpdateModel(newModel);
+  };
+
+  const handleTraceFile = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.traceFile = e.target.value;
+    handleUpdateModel(newModel);
+  };
+
   return (
     <Box p={4}>
       <Typography variant="h5" gutterBottom>
@@ -71,6 +143,28 @@ const App = () => {
         label="SessionToken"
         placeholder="Enter Session Token"
       />
+      <Typography variant="h5" gutterBottom>
+        Retries for throttled or failed requests (default: 5):
+      </Typography>
+      <TextField
+        fullWidth
+        id="max_retries"
+        value={model.Configuration.maxRetries || 5}
+        type="number"
+        onChange={handleMaxRetries}
+        label="Enter max retries per request, e.g. 5"
+      />
+      <Typography variant="h5" gutterBottom>
+        Input memory limit in MB (default: 256):
+      </Typography>
+      <TextField
+        fullWidth
+        id="spill_threshold_mb"
+        value={model.Configuration.spillThresholdMB || 256}
+        type="number"
+        onChange={handleSpillThresholdMB}
+        label="Input beyond this size is buffered in a temporary file"
+      />
       <Typography variant="h5" gutterBottom>
         Write a prompt:
       </Typography>
@@ -85,6 +179,71 @@ const App = () => {
         placeholder="Start typing prompt here..."
       />
 
+      <Box mt={3}>
+        <FormControlLabel
+          control={
+            <Checkbox
+              checked={String(model.Configuration.streamResponse) === 'true'}
+              onChange={handleStreamResponse}
+            />
+          }
+          label="Stream the model response and output rows as they arrive (Output Table only)"
+        />
+        <FormControlLabel
+          control={
+            <Checkbox
+              checked={String(model.Configuration.metricsOutput) === 'true'}
+              onChange={handleMetricsOutput}
+            />
+          }
+          label="Write per-call latency and token metrics to the Metrics output"
+        />
+      </Box>
+
+      <Box mt={3}>
+        <FormControlLabel
+          control={
+            <Checkbox
+              checked={String(model.Configuration.useCache) === 'true'}
+              onChange={handleUseCache}
+            />
+          }
+          label="Cache model responses locally (reruns with identical prompts skip Bedrock)"
+        />
+        <TextField
+          type="number"
+          id="cache_ttl_hours"
+          value={model.Configuration.cacheTtlHours || 24}
+          onChange={handleCacheTtlHours}
+          label="Cache expiry in hours (default: 24)"
+        />
+        <TextField
+          type="number"
+          id="cache_max_entries"
+          value={model.Configuration.cacheMaxEntries || 10000}
+          onChange={handleCacheMaxEntries}
+          label="Max cached responses (default: 10000)"
+        />
+      </Box>
+
+      <Box mt={3}>
+        <Typography variant="h6" gutterBottom>
+          Select Prompt Format:
+        </Typography>
+        <RadioGroup
+          value={model.Configuration.promptFormat || 'json'}
+          onChange={handlePromptFormatChange}
+          aria-label="prompt format"
+          name="prompt-format-group"
+        >
+          <FormControlLabel value="json" control={<Radio />} label="JSON array" />
+          <FormControlLabel value="jsonl" control={<Radio />} label="JSON lines (header once)" />
+          <FormControlLabel value="csv" control={<Radio />} label="CSV" />
+          <FormControlLabel value="tsv" control={<Radio />} label="TSV" />
+          <FormControlLabel value="columnar" control={<Radio />} label="Columnar JSON" />
+        </RadioGroup>
+      </Box>
+
       <Box mt={3}>
         <Typography variant="h6" gutterBottom>
           Select Output Type:
@@ -99,6 +258,44 @@ const App = () => {
           <FormControlLabel value="analysis" control={<Radio />} label="Output Analysis" />
         </RadioGroup>
       </Box>
+
+      <Box mt={3}>
+        <Typography variant="h6" gutterBottom>
+          Log Level:
+        </Typography>
+        <RadioGroup
+          value={model.Configuration.logLevel || 'info'}
+          onChange={handleLogLevelChange}
+          aria-label="log level"
+          name="log-level-group"
+        >
+          <FormControlLabel value="debug" control={<Radio />} label="Debug (prompts, responses and sampled per-row messages)" />
+          <FormControlLabel value="info" control={<Radio />} label="Info" />
+          <FormControlLabel value="warn" control={<Radio />} label="Warnings and errors only" />
+          <FormControlLabel value="error" control={<Radio />} label="Errors only" />
+        </RadioGroup>
+        <TextField
+          type="number"
+          id="log_truncate"
+          value={model.Configuration.logTruncate || 500}
+          onChange={handleLogTruncate}
+          label="Characters of each logged payload (default: 500)"
+        />
+        <TextField
+          type="number"
+          id="log_sample_rate"
+          value={model.Configuration.logSampleRate || 100}
+          onChange={handleLogSampleRate}
+          label="Log 1 in every N per-row messages (default: 100)"
+        />
+        <TextField
+          fullWidth
+          id="trace_file"
+          value={model.Configuration.traceFile || ''}
+          onChange={handleTraceFile}
+          label="Trace file for full payloads (optional)"
+        />
+      </Box>
     </Box>
   );
 };
@@ -21,11 +21,555 @@ from ayx_python_sdk.core import (
 from ayx_python_sdk.providers.amp_provider.amp_provider_v2 import AMPProviderV2
 
 import pyarrow as pa
-import requests
 import json
 import re
 import time
+import os
+import hashlib
+import sqlite3 # For the local response cache
+import tempfile
+import threading
+import asyncio # For fetching result pages concurrently
+from html.parser import HTMLParser
+from concurrent.futures import ThreadPoolExecutor # For concurrent searches
 from datetime import datetime
+from urllib.parse import urlparse
+
+SEARCH_URL = "https://www.googleapis.com/customsearch/v1"
+PAGE_SIZE = 10 # The API returns at most 10 results per request
+MAX_RESULTS = 100 # The API will not return results past the 100th
+RESULT_FLUSH_ROWS = 1000 # Rows to collect before writing a batch to the output anchor
+
+# Fixed output schema so every streamed batch (and an empty result set) has the same columns
+SEARCH_RESULT_SCHEMA = pa.schema([
+    ("query", pa.string()),
+    ("result_rank", pa.int64()),
+    ("title", pa.string()),
+    ("snippet", pa.string()),
+    ("link", pa.string()),
+    ("display_link", pa.string()),
+    ("formatted_url", pa.string()),
+    ("search_timestamp", pa.timestamp("us")),
+])
+
+# Custom Search item keys for each string column after query and result_rank
+RESULT_ITEM_KEYS = ["title", "snippet", "link", "displayLink", "formattedUrl"]
+
+# Extra column added after search_timestamp when fetchPageText is on
+PAGE_TEXT_FIELD = pa.field("page_text", pa.string())
+PAGE_USER_AGENT = "Mozilla/5.0 (compatible; AlteryxGoogleAPITool)"
+PAGE_CHUNK_BYTES = 64 * 1024 # Size of each read from a page body
+
+class PageTextParser(HTMLParser):
+    """
+    Extracts the readable text from an HTML page.
+
+    Scripts, styles and page furniture such as navigation, headers and footers are skipped.
+    If the page marks its main content with <main> or <article>, only that text is kept.
+    """
+
+    SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "nav", "header", "footer", "aside", "form"}
+    MAIN_TAGS = {"main", "article"}
+    BLOCK_TAGS = {"p", "div", "br", "li", "tr", "section", "h1", "h2", "h3", "h4", "h5", "h6", "blockquote", "pre"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.skip_depth = 0
+        self.main_depth = 0
+        self.parts = []
+        self.main_parts = []
+
+    def handle_starttag(self, tag: str, attrs: list) -> None:
+        if tag in self.SKIP_TAGS:
+            self.skip_depth += 1
+        elif tag in self.MAIN_TAGS:
+            self.main_depth += 1
+        elif tag in self.BLOCK_TAGS:
+            self.add_text("\n")
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in self.SKIP_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+        elif tag in self.MAIN_TAGS:
+            self.main_depth = max(0, self.main_depth - 1)
+        elif tag in self.BLOCK_TAGS:
+            self.add_text("\n")
+
+    def handle_data(self, data: str) -> None:
+        self.add_text(data)
+
+    def add_text(self, text: str) -> None:
+        if self.skip_depth:
+            return
+        self.parts.append(text)
+        if self.main_depth:
+            self.main_parts.append(text)
+
+    def get_text(self) -> str:
+        """Return the main text, or all the text if the page has no main content, one paragraph per line."""
+        text = "".join(self.main_parts if "".join(self.main_parts).strip() else self.parts)
+        lines = (" ".join(line.split()) for line in text.splitlines())
+        return "\n".join(line for line in lines if line)
+
+def extract_page_text(html: str) -> str:
+    """Extract the main text from an HTML page."""
+    parser = PageTextParser()
+    parser.feed(html)
+    parser.close()
+    return parser.get_text()
+
+class PageFetcher:
+    """
+    Fetches result pages concurrently with aiohttp and extracts their text.
+
+    Requests run on an event loop in a background thread over one pooled session, which is
+    kept for the whole run. At most `concurrency` pages are fetched at once, and at most
+    `connections_per_host` from any one host. Once a page has a slot it must arrive within
+    `timeout_seconds`, and only its first `max_bytes` are read.
+    """
+
+    def __init__(self, log, concurrency: int, connections_per_host: int, timeout_seconds: float, max_bytes: int):
+        self.log = log
+        self.concurrency = concurrency
+        self.connections_per_host = connections_per_host
+        self.timeout_seconds = timeout_seconds
+        self.max_bytes = max_bytes
+        self.loop = None
+        self.thread = None
+        self.session = None
+        self.slots = None
+        self.host_slots = {}
+        self.fetched = 0
+        self.failed = 0
+
+    def fetch_all(self, urls: list) -> list:
+        """Return the text of each page, in URL order, with None for pages that could not be fetched."""
+        if self.loop is None:
+            self.loop = asyncio.new_event_loop()
+            self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+            self.thread.start()
+        unique_urls = list(dict.fromkeys(url for url in urls if url))
+        texts = asyncio.run_coroutine_threadsafe(self.fetch_pages(unique_urls), self.loop).result()
+        page_texts = dict(zip(unique_urls, texts))
+        return [page_texts.get(url) for url in urls]
+
+    async def fetch_pages(self, urls: list) -> list:
+        """
+        Fetch pages concurrently over the pooled session, creating it on first use.
+
+        aiohttp is imported here rather than at the top of the file so the tool only needs it
+        when page text is fetched.
+        """
+        if self.session is None:
+            import aiohttp
+
+            connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.connections_per_host)
+            self.session = aiohttp.ClientSession(connector=connector, headers={"User-Agent": PAGE_USER_AGENT})
+            self.slots = asyncio.Semaphore(self.concurrency)
+        texts = await asyncio.gather(*(self.fetch_page(url) for url in urls), return_exceptions=True)
+        return [None if isinstance(text, BaseException) else text for text in texts]
+
+    async def fetch_page(self, url: str):
+        """
+        Fetch one page and extract its text, returning None if it failed or is not text.
+
+        The timeout starts once the page has a slot, so pages queued behind a busy host do not time out.
+        """
+        if not url.startswith(("http://", "https://")):
+            return None
+        try:
+            host = urlparse(url).netloc
+            if host not in self.host_slots:
+                self.host_slots[host] = asyncio.Semaphore(self.connections_per_host)
+            async with self.host_slots[host], self.slots:
+                body, charset, content_type = await asyncio.wait_for(self.read_page(url), self.timeout_seconds)
+        except Exception as e: # Network errors, timeouts and links that cannot be requested - only this page is lost
+            self.failed += 1
+            self.log.sampled("Page fetch failed", f"{url}: {e!r}")
+            return None
+        if body is None:
+            return None
+
+        try:
+            text = body.decode(charset, errors="replace")
+        except LookupError: # Unknown charset
+            text = body.decode("utf-8", errors="replace")
+        self.fetched += 1
+        if "html" in content_type or "xml" in content_type:
+            try:
+                return extract_page_text(text)
+            except Exception as e:
+                self.log.sampled("Page text extraction failed", f"{url}: {e!r}")
+                return None
+        return text
+
+    async def read_page(self, url: str) -> tuple:
+        """Read up to max_bytes of a page, returning its body, charset and content type (no body if it is not text)."""
+        async with self.session.get(url) as response:
+            response.raise_for_status()
+            content_type = response.content_type or ""
+            if not content_type.startswith("text/") and "html" not in content_type and "xml" not in content_type:
+                return None, None, content_type
+            chunks = []
+            size = 0
+            async for chunk in response.content.iter_chunked(PAGE_CHUNK_BYTES):
+                chunks.append(chunk[:self.max_bytes - size])
+                size += len(chunk)
+                if size >= self.max_bytes:
+                    break # Pages over the cap are cut short
+            return b"".join(chunks), response.charset or "utf-8", content_type
+
+    def close(self) -> None:
+        """Close the session and stop the event loop."""
+        if self.loop is None:
+            return
+        if self.session is not None:
+            asyncio.run_coroutine_threadsafe(self.session.close(), self.loop).result()
+            self.session = None
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+        self.loop = None
+
+class SearchResultBuilder:
+    """
+    Collects search results column by column and writes them as record batches with SEARCH_RESULT_SCHEMA.
+
+    Column buffers are allocated once at `flush_rows` and reused, so memory stays flat however
+    many results are collected. A batch is written whenever the buffers fill up and on flush().
+    With a `page_fetcher`, each batch's result links are fetched when it is written and their
+    text is added as a page_text column.
+    """
+
+    def __init__(self, provider: AMPProviderV2, flush_rows: int = RESULT_FLUSH_ROWS, page_fetcher: "PageFetcher" = None):
+        self.provider = provider
+        self.flush_rows = flush_rows
+        self.page_fetcher = page_fetcher
+        self.schema = SEARCH_RESULT_SCHEMA.append(PAGE_TEXT_FIELD) if page_fetcher else SEARCH_RESULT_SCHEMA
+        self.columns = [[None] * flush_rows for _ in SEARCH_RESULT_SCHEMA]
+        self.size = 0
+        self.rows_written = 0
+
+    def add(self, query: str, items: list, timestamp: datetime) -> None:
+        """Add one row per search result item, ranked by position."""
+        for rank, item in enumerate(items, 1):
+            row = self.size
+            self.columns[0][row] = query
+            self.columns[1][row] = rank
+            for column, key in zip(self.columns[2:-1], RESULT_ITEM_KEYS):
+                column[row] = item.get(key, '')
+            self.columns[-1][row] = timestamp
+            self.size += 1
+            if self.size == self.flush_rows:
+                self.flush()
+
+    def flush(self) -> None:
+        """Write the buffered rows to the output anchor."""
+        if not self.size:
+            return
+        arrays = [
+            pa.array(column[:self.size] if self.size < self.flush_rows else column, type=field.type)
+            for column, field in zip(self.columns, SEARCH_RESULT_SCHEMA)
+        ]
+        if self.page_fetcher:
+            links = self.columns[4][:self.size] # The link column
+            arrays.append(pa.array(self.page_fetcher.fetch_all(links), type=PAGE_TEXT_FIELD.type))
+        batch = pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+        self.provider.write_to_anchor("Output", pa.Table.from_batches([batch]))
+        self.rows_written += self.size
+        self.size = 0
+
+    def finish(self) -> None:
+        """Flush the remaining rows, writing an empty table with the full schema if there were no results."""
+        self.flush()
+        if self.rows_written == 0:
+            self.provider.write_to_anchor("Output", self.schema.empty_table())
+
+class RateLimiter:
+    """Token bucket limiter shared by all search threads so requests stay within the API's QPS quota."""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.capacity = max(1.0, rate) # Allow up to one second of burst
+        self.tokens = self.capacity
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a request is allowed."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+                self.last_refill = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class ResponseCache:
+    """SQLite cache of API responses with a time-to-live and least-recently-used size limit."""
+
+    def __init__(self, path: str, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self.lock, self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT, created REAL, accessed REAL)"
+            )
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """Hash the request parameters into a cache key."""
+        return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        """Return the cached value for a key, or None if it is missing or expired."""
+        now = time.time()
+        with self.lock, self.connection:
+            row = self.connection.execute("SELECT value, created FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                self.misses += 1
+                return None
+            self.connection.execute("UPDATE cache SET accessed = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value) -> None:
+        """Store a value in the cache."""
+        now = time.time()
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO cache (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now)
+            )
+
+    def close(self) -> None:
+        """Drop expired entries, evict the least recently used entries over the size limit and close."""
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM cache WHERE created < ?", (time.time() - self.ttl_seconds,))
+            self.connection.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+        self.connection.close()
+
+class CheckpointJournal:
+    """
+    Append-only JSON lines file recording each completed work item so an interrupted run can resume.
+
+    Every line holds an item key and its result. Reopening the same file loads the completed
+    items, so a rerun only processes what is missing. The file is deleted once a run succeeds.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.completed = {}
+        self.lock = threading.Lock()
+        partial_line = False
+        if os.path.exists(path):
+            with open(path, "rb") as journal:
+                for line in journal:
+                    partial_line = not line.endswith(b"\n")
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue # A line cut short when the previous run stopped
+                    self.completed[entry["key"]] = entry["value"]
+        self.file = open(path, "a", encoding="utf-8")
+        if partial_line:
+            self.file.write("\n") # Start the next entry on its own line
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """Hash the item and settings that determine its result into a journal key."""
+        return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        """Return the recorded result for an item, or None if it has not completed."""
+        return self.completed.get(key)
+
+    def record(self, key: str, value) -> None:
+        """Append a completed item and flush it to disk straight away."""
+        line = json.dumps({"key": key, "value": value})
+        with self.lock:
+            self.completed[key] = value
+            self.file.write(line + "\n")
+            self.file.flush()
+
+    def close(self, delete: bool = False) -> None:
+        """Close the journal, deleting it if the run finished without failures."""
+        self.file.close()
+        if delete:
+            os.remove(self.path)
+
+class SpillBuffer:
+    """
+    Buffers incoming batches as Arrow data, spilling them to a temporary Arrow IPC file past a memory limit.
+
+    Batches stay in memory until they use more than `max_bytes`. They are then written to the spill
+    file and dropped from memory. The spill file is memory-mapped when read back, so the data is only
+    paged in as it is used and reading a subset of columns only touches those columns.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.tables = []
+        self.schema = None
+        self.buffered_bytes = 0
+        self.num_rows = 0
+        self.num_batches = 0
+        self.spill_path = None
+        self.writer = None
+        self.source = None
+
+    def __bool__(self) -> bool:
+        return self.num_batches > 0
+
+    def append(self, table: "pa.Table") -> None:
+        """Add a batch, spilling everything buffered so far if it goes over the memory limit."""
+        if self.schema is None:
+            self.schema = table.schema
+        self.tables.append(table)
+        self.buffered_bytes += table.nbytes
+        self.num_rows += table.num_rows
+        self.num_batches += 1
+        if self.buffered_bytes > self.max_bytes:
+            self.spill()
+
+    def spill(self) -> None:
+        """Write the in-memory batches to the spill file and release them."""
+        if self.writer is None:
+            fd, self.spill_path = tempfile.mkstemp(prefix="alteryx_input_", suffix=".arrow")
+            os.close(fd)
+            self.writer = pa.ipc.new_file(self.spill_path, self.schema)
+        for table in self.tables:
+            self.writer.write_table(table)
+        self.tables = []
+        self.buffered_bytes = 0
+
+    def iter_batches(self, columns: list = None):
+        """Yield the buffered data as record batches in arrival order, keeping only `columns` (names or indices) if given."""
+        if self.spill_path:
+            if self.writer is not None:
+                self.writer.close()
+                self.writer = None
+            if self.source is None:
+                self.source = pa.memory_map(self.spill_path)
+            reader = pa.ipc.open_file(self.source)
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i)
+                yield batch.select(columns) if columns is not None else batch
+        for table in self.tables:
+            for batch in table.to_batches():
+                yield batch.select(columns) if columns is not None else batch
+
+    def read_table(self, columns: list = None) -> "pa.Table":
+        """Read the buffered data as one table. Spilled batches are memory-mapped rather than copied."""
+        batches = list(self.iter_batches(columns))
+        if not batches:
+            empty_table = self.schema.empty_table()
+            return empty_table.select(columns) if columns is not None else empty_table
+        return pa.Table.from_batches(batches)
+
+    def close(self) -> None:
+        """Release the buffered batches and delete the spill file."""
+        self.tables = []
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        if self.source is not None:
+            self.source.close()
+            self.source = None
+        if self.spill_path:
+            try:
+                os.remove(self.spill_path)
+            except OSError:
+                pass # Still mapped by a table in use (Windows) - it is left in the temp folder
+            self.spill_path = None
+
+LOG_LEVELS = {"debug": 10, "info": 20, "warn": 30, "error": 40}
+
+class ToolLogger:
+    """
+    Sends the tool's messages to Designer through provider.io, filtered by log level.
+
+    Prompt and response payloads are debug messages cut to `truncate` characters, and per-row
+    messages are only sent for 1 in every `sample_rate` rows. When a trace file is set, every
+    payload is also written to it in full, so large dumps stay out of the AMP message channel.
+    """
+
+    def __init__(self, io, level: str = "info", truncate: int = 500, sample_rate: int = 100, trace_path: str = None):
+        self.io = io
+        if level not in LOG_LEVELS:
+            io.warn(f"Unknown log level '{level}' - defaulting to info.")
+        self.level = LOG_LEVELS.get(level, LOG_LEVELS["info"])
+        self.truncate = truncate
+        self.sample_rate = sample_rate
+        self.samples = 0
+        self.lock = threading.Lock()
+        self.trace_file = None
+        if trace_path:
+            try:
+                self.trace_file = open(trace_path, "a", encoding="utf-8")
+            except OSError as e:
+                io.warn(f"Could not open trace file {trace_path}: {e}")
+
+    def debug(self, message: str) -> None:
+        if self.level <= LOG_LEVELS["debug"]:
+            self.io.info(message)
+
+    def info(self, message: str) -> None:
+        if self.level <= LOG_LEVELS["info"]:
+            self.io.info(message)
+
+    def warn(self, message: str) -> None:
+        if self.level <= LOG_LEVELS["warn"]:
+            self.io.warn(message)
+
+    def error(self, message: str) -> None:
+        self.io.error(message)
+
+    def shorten(self, text: str) -> str:
+        """Cut text to the truncation length, noting how much was left out."""
+        if len(text) <= self.truncate:
+            return text
+        return f"{text[:self.truncate]}... ({len(text) - self.truncate} more characters)"
+
+    def payload(self, label: str, value) -> None:
+        """
+        Log a prompt, response or other large value.
+
+        It is only converted to text if it will be used: a truncated copy is sent at debug level
+        and the full text goes to the trace file.
+        """
+        if self.level > LOG_LEVELS["debug"] and not self.trace_file:
+            return
+        text = value if isinstance(value, str) else str(value)
+        self.debug(f"{label}: {self.shorten(text)}")
+        if self.trace_file:
+            with self.lock:
+                self.trace_file.write(f"{datetime.now().isoformat()} {label}\n{text}\n\n")
+
+    def sampled(self, label: str, value) -> None:
+        """Log a per-row debug message for only 1 in every sample_rate calls."""
+        if self.level > LOG_LEVELS["debug"]:
+            return
+        with self.lock:
+            self.samples += 1
+            send = (self.samples - 1) % self.sample_rate == 0
+        if send:
+            self.io.info(self.shorten(f"{label}: {value}"))
+
+    def close(self) -> None:
+        if self.trace_file:
+            self.trace_file.close()
+            self.trace_file = None
 
 class GoogleAPITool(PluginV2):
     """A sample Plugin that passes data from an input connection to an output connection."""
@@ -34,19 +578,82 @@ class GoogleAPITool(PluginV2):
         """Construct the plugin."""
         self.name = "GoogleAPITool"
         self.provider = provider
+
+        # Diagnostic logging - payloads are debug messages, optionally written in full to a trace file
+        self.log = ToolLogger(
+            provider.io,
+            provider.tool_config.get("logLevel", "info"),
+            self.get_int_config("logTruncate", 500),
+            self.get_int_config("logSampleRate", 100),
+            provider.tool_config.get("traceFile") or None,
+        )
         
-        self.batches = []
-        self.search_results = []
+        self.input_buffer = SpillBuffer(self.get_int_config("spillThresholdMB", 256) * 1024 * 1024) # Spilled to disk past this size
+
+        # Optional page_text column holding the text of each result's landing page
+        self.page_fetcher = None
+        if str(provider.tool_config.get("fetchPageText", False)).lower() == "true":
+            self.page_fetcher = PageFetcher(
+                self.log,
+                self.get_int_config("pageConcurrency", 20),
+                self.get_int_config("pageConnectionsPerHost", 2),
+                self.get_int_config("pageTimeoutSeconds", 10),
+                self.get_int_config("pageMaxKB", 512) * 1024,
+            )
+        self.results = SearchResultBuilder(provider, page_fetcher=self.page_fetcher)
         self.api_key = provider.tool_config.get("apiKey")
         self.search_engine_id = provider.tool_config.get("searchEngineId")
+        self.output_mode = provider.tool_config.get("outputMode", "buffered") # "streaming" searches each batch as it arrives
+
+        self.max_workers = self.get_int_config("maxWorkers", 4) # Concurrent searches
+        try:
+            self.queries_per_second = float(provider.tool_config.get("queriesPerSecond", 1))
+        except (TypeError, ValueError):
+            self.queries_per_second = 0
+        if self.queries_per_second <= 0:
+            self.queries_per_second = 1.0
+            self.log.warn("Invalid queries per second - defaulting to 1.")
+        self.rate_limiter = RateLimiter(self.queries_per_second)
+
+        # Optional local cache of search results so repeated queries skip the API
+        self.cache = None
+        if str(provider.tool_config.get("useCache", False)).lower() == "true":
+            cache_path = provider.tool_config.get("cachePath") or os.path.join(tempfile.gettempdir(), "alteryx_google_api_cache.sqlite")
+            cache_ttl_hours = self.get_int_config("cacheTtlHours", 24)
+            cache_max_entries = self.get_int_config("cacheMaxEntries", 10000)
+            try:
+                self.cache = ResponseCache(cache_path, cache_ttl_hours * 3600, cache_max_entries)
+            except sqlite3.Error as e:
+                self.log.warn(f"Could not open search cache at {cache_path}: {e}")
 
-        max_num = int(provider.tool_config.get("maxNum", 10))
-        if (max_num < 1 or max_num > 10): # num of searches must be between 1 and 10 inclusively
+        # One pooled session so connections are reused across queries, created on the first search
+        self.session = None
+        self.session_lock = threading.Lock()
+
+        try:
+            max_num = int(provider.tool_config.get("maxNum", 10))
+        except (TypeError, ValueError):
+            max_num = 0
+        if (max_num < 1 or max_num > MAX_RESULTS): # num of searches must be between 1 and 100 inclusively
             self.max_searches = 10
-            self.provider.io.warn("Invalid number of searches - setting max searches to 10")
+            self.log.warn(f"Invalid number of searches - must be between 1 and {MAX_RESULTS}. Setting max searches to 10")
         else:
             self.max_searches = max_num
-        self.provider.io.info(f"{self.name} tool started")
+
+        # Pages after the first are fetched on their own executor - sharing the query executor could deadlock
+        # when every query thread is waiting on page requests that have no free thread to run on
+        self.page_executor = ThreadPoolExecutor(max_workers=self.max_workers)
+
+        # Optional checkpoint journal so a rerun after an interruption only searches the unfinished queries.
+        # It is opened by open_journal once there are queries to search, so config passes never touch it.
+        self.journal = None
+        self.checkpoint_path = None
+        self.searched = False # Whether any queries were searched, i.e. whether the run got as far as the journal
+        self.failed_queries = 0
+        if str(provider.tool_config.get("useCheckpoint", False)).lower() == "true":
+            run_key = CheckpointJournal.make_key(self.search_engine_id, self.max_searches)[:16]
+            self.checkpoint_path = provider.tool_config.get("checkpointPath") or os.path.join(tempfile.gettempdir(), f"alteryx_google_api_checkpoint_{run_key}.jsonl")
+        self.log.info(f"{self.name} tool started")
 
     def on_record_batch(self, batch: "pa.Table", anchor: Anchor) -> None:
         """
@@ -63,7 +670,15 @@ class GoogleAPITool(PluginV2):
         anchor
             A namedtuple('Anchor', ['name', 'connection']) containing input connection identifiers.
         """
-        self.batches.append(batch) # To get all table inputs
+        if self.output_mode == "streaming":
+            # Search and write this batch straight away - errors are reported in on_complete
+            if not self.api_key or not self.search_engine_id:
+                return
+            self.open_journal()
+            self.search_queries(batch.column(0).to_pylist())
+            self.results.flush()
+        else:
+            self.input_buffer.append(batch) # To get all table inputs
 
     def on_incoming_connection_complete(self, anchor: Anchor) -> None:
         """
@@ -76,49 +691,194 @@ class GoogleAPITool(PluginV2):
         anchor
             NamedTuple containing anchor.name and anchor.connection.
         """
-        self.provider.io.info(
+        self.log.info(
             f"Received complete update from {anchor.name}:{anchor.connection}."
         )
 
-    def search_google(self, query: str) -> list:
-        """Search Google using Custom Search API"""
-        num_results = self.max_searches
+    def get_int_config(self, key: str, default: int) -> int:
+        """Read a positive integer from the tool config, falling back to the default if invalid."""
+        value = self.provider.tool_config.get(key, default)
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            value = 0
+        if value < 1:
+            self.provider.io.warn(f"Invalid value for {key} - defaulting to {default}.")
+            return default
+        return value
+
+    def get_session(self):
+        """
+        Return the pooled HTTP session, creating it on first use.
+
+        requests is imported here rather than at the top of the file so loading the tool to
+        validate or update its configuration in Designer does not pay for the import.
+        """
+        with self.session_lock:
+            if self.session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                self.session = requests.Session()
+                self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers * 2))
+        return self.session
+
+    def search_google(self, query: str, start: int = 1, num_results: int = PAGE_SIZE) -> tuple:
+        """
+        Search Google using Custom Search API, returning one page of results starting at `start` (1-based)
 
-        url = "https://www.googleapis.com/customsearch/v1"
+        Also returns the number of the last result the API reports for the query: the end of this
+        page if there is no next page, otherwise searchInformation.totalResults.
+        Returns (None, None) if the request failed.
+        """
+        url = SEARCH_URL
         params = {
             'key': self.api_key,
             'cx': self.search_engine_id,
             'q': query,
-            'num': num_results
+            'num': num_results,
+            'start': start
         }
-        
+
+        if self.cache:
+            cache_key = ResponseCache.make_key(query, self.search_engine_id, num_results, start)
+            cached = self.cache.get(cache_key)
+            if isinstance(cached, dict): # Entries from older runs only hold the items and are searched again
+                return cached["items"], cached["last_result"]
+
+        import requests # Already loaded by get_session
+
+        session = self.get_session()
+        self.rate_limiter.acquire()
         try:
-            response = requests.get(url, params=params)
+            response = session.get(url, params=params)
             response.raise_for_status()
             data = response.json()
-            return data.get('items', [])
+            items = data.get('items', [])
+            if "nextPage" in data.get("queries", {}):
+                try:
+                    last_result = int(data["searchInformation"]["totalResults"])
+                except (KeyError, TypeError, ValueError):
+                    last_result = MAX_RESULTS
+            else:
+                last_result = start + len(items) - 1
+            if self.cache:
+                self.cache.set(cache_key, {"items": items, "last_result": last_result})
+            return items, last_result
         except requests.exceptions.RequestException as e:
-            self.provider.io.error(f"Error searching for '{query}': {e}")
-            return None
+            self.log.error(f"Error searching for '{query}' (start {start}): {e}")
+            return None, None
 
-    def collect_data(self, query: str) -> None:
-        """Collect search data for a single query"""
-        self.provider.io.info(f"  Searching: {query}")
-        results = self.search_google(query)
-        if not results:
-            return None
-        for i, result in enumerate(results, 1):
-            self.search_results.append({
-                'query': query,
-                'result_rank': i,
-                'title': result.get('title', ''),
-                'snippet': result.get('snippet', ''),
-                'link': result.get('link', ''),
-                'display_link': result.get('displayLink', ''),
-                'formatted_url': result.get('formattedUrl', ''),
-                'search_timestamp': datetime.now().isoformat()
-            })
-        time.sleep(1)
+    def search_pages(self, query: str) -> list:
+        """
+        Fetch up to max_searches results for a query, PAGE_SIZE results per request.
+
+        The first page is fetched on its own so queries with few results only cost one request.
+        Its response says how many results the query has, so only pages up to that number are
+        requested. They are fetched concurrently and merged in order, stopping at the first page
+        that failed or came back short. Returns the results and whether every request succeeded.
+        """
+        first_num = min(PAGE_SIZE, self.max_searches)
+        results, last_result = self.search_google(query, 1, first_num)
+        if results is None:
+            return [], False
+        if len(results) < first_num:
+            return results, True
+
+        end = min(self.max_searches, last_result)
+        pages = [(start, min(PAGE_SIZE, end - start + 1)) for start in range(1, end + 1, PAGE_SIZE)]
+        if len(pages) < 2:
+            return results, True
+
+        futures = [self.page_executor.submit(self.search_google, query, start, num_results) for start, num_results in pages[1:]]
+        for (start, num_results), future in zip(pages[1:], futures):
+            items, _ = future.result()
+            if items:
+                results.extend(items)
+            if not items or len(items) < num_results:
+                for pending in futures:
+                    pending.cancel() # Skip pages past the end that have not been requested yet
+                return results, items is not None
+        return results, True
+
+    def collect_data(self, query: str) -> tuple:
+        """
+        Collect search data for a single query.
+
+        Returns the result items, when they were searched and whether every request succeeded.
+        Queries recorded in the checkpoint journal are returned from it without searching again.
+        """
+        journal_key = None
+        if self.journal:
+            journal_key = CheckpointJournal.make_key(query)
+            entry = self.journal.get(journal_key)
+            if entry is not None:
+                return entry["items"], datetime.fromisoformat(entry["timestamp"]), True
+
+        self.log.sampled("Searching", query)
+        search_timestamp = datetime.now()
+        results, complete = self.search_pages(query)
+        if complete and self.journal:
+            self.journal.record(journal_key, {"items": results, "timestamp": search_timestamp.isoformat()})
+        return results, search_timestamp, complete
+
+    def open_journal(self) -> None:
+        """Open the checkpoint journal, if enabled, the first time queries are about to be searched."""
+        if self.checkpoint_path is None or self.journal is not None:
+            return
+        checkpoint_path, self.checkpoint_path = self.checkpoint_path, None # Only try once
+        try:
+            self.journal = CheckpointJournal(checkpoint_path)
+        except OSError as e:
+            self.log.warn(f"Could not open checkpoint journal at {checkpoint_path}: {e}")
+        else:
+            if self.journal.completed:
+                self.log.info(f"Resuming from checkpoint: {len(self.journal.completed)} queries already searched.")
+
+    def search_queries(self, queries: list) -> None:
+        """
+        Search queries concurrently within the rate limit, keeping results in query order.
+
+        Each distinct query is only searched once and its results are repeated for every row
+        with the same query.
+        """
+        self.searched = True
+        queries = [query for query in queries if query]
+        unique_queries = list(dict.fromkeys(queries))
+        if len(unique_queries) < len(queries):
+            self.log.info(f"Searching {len(unique_queries)} distinct queries for {len(queries)} rows.")
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = dict(zip(unique_queries, executor.map(self.collect_data, unique_queries)))
+        self.failed_queries += sum(not complete for _, _, complete in results.values())
+
+        for query in queries:
+            items, search_timestamp, _ = results[query]
+            self.results.add(query, items, search_timestamp)
+
+    def free_resources(self, finished: bool = True) -> None:
+        """
+        Close the input buffer, HTTP sessions, page executor, search cache, checkpoint journal and trace file.
+
+        Pass finished=False when the run stops before searching, so the checkpoint journal is kept for the next run.
+        The journal is only open once queries have been searched.
+        """
+        self.input_buffer.close()
+        self.log.close()
+        self.page_executor.shutdown()
+        if self.session:
+            self.session.close()
+        if self.page_fetcher:
+            self.page_fetcher.close()
+            self.log.info(f"Fetched page text for {self.page_fetcher.fetched} links, {self.page_fetcher.failed} failed.")
+        if self.journal:
+            # Keep the journal if any query failed so a rerun only retries those queries
+            self.journal.close(delete=finished and self.failed_queries == 0)
+            if self.failed_queries:
+                self.log.warn(f"{self.failed_queries} queries failed. Rerun to retry them - completed queries are kept in {self.journal.path}.")
+        if self.cache:
+            self.log.info(f"Search cache: {self.cache.hits} hits, {self.cache.misses} misses.")
+            self.cache.close()
 
     def on_complete(self) -> None:
         """
@@ -135,25 +895,30 @@ class GoogleAPITool(PluginV2):
         """
 
         if not self.api_key:
-            self.provider.io.error("No API key.")
+            self.log.error("No API key.")
+            self.free_resources(finished=False)
             return
         if not self.search_engine_id:
-            self.provider.io.error("No search engine key.")
+            self.log.error("No search engine key.")
+            self.free_resources(finished=False)
             return
 
-        if self.batches:
-            input_table = pa.concat_tables(self.batches)
-            input_rows = input_table.to_pylist()
+        if self.output_mode == "streaming":
+            self.results.finish()
+            self.log.info(f"Streamed {self.results.rows_written} search results. {self.name} tool done.")
+        elif self.input_buffer:
+            queries = [
+                query
+                for batch in self.input_buffer.iter_batches(columns=[0]) # the first column holds the queries
+                for query in batch.column(0).to_pylist()
+            ]
+            self.open_journal()
+            self.search_queries(queries)
+
+            self.results.finish()
+            self.log.info(f"Data collection complete. {self.name} tool done.")
         else:
-            self.provider.io.error("No input data received.")
-            return
-        
-        for item in input_rows:
-            query_text = next(iter(item.values())) # get the first value from the dict
-            if query_text:
-                self.collect_data(query_text)
-
-        output_table = pa.Table.from_pylist(self.search_results) # Output table from response
-        self.provider.write_to_anchor("Output", output_table)
-        self.provider.io.info(f"Data collection complete. {self.name} tool done.")
-        
\ No newline at end of file
+            self.log.error("No input data received.")
+
+        # A run with no input (including Designer's update-only pass) keeps the journal for the next run
+        self.free_resources(finished=self.searched)
@@ -1,6 +1,6 @@
 import React, { useContext } from 'react';
 import ReactDOM from 'react-dom';
-import { AyxAppWrapper, Box, Typography, TextField, RadioGroup, Radio, FormControlLabel } from '@alteryx/ui';
+import { AyxAppWrapper, Box, Typography, TextField, RadioGroup, Radio, FormControlLabel, Checkbox } from '@alteryx/ui';
 import { Context as UiSdkContext, DesignerApi } from '@alteryx/react-comms';
 
 const App = () => {
@@ -24,6 +24,108 @@ const App = () => {
     handleUpdateModel(newModel);
   };
 
+  const handleQueriesPerSecond = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.queriesPerSecond = e.target.value;
+    handleUpdateModel(newModel);
+  };
+
+  const handleMaxWorkers = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.maxWorkers = e.target.value;
+    handleUpdateModel(newModel);
+  };
+
+  const handleSpillThresholdMB = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.spillThresholdMB = e.target.value;
+    handleUpdateModel(newModel);
+  };
+
+  const handleUseCheckpoint = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.useCheckpoint = e.target.checked;
+    handleUpdateModel(newModel);
+  };
+
+  const handleUseCache = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.useCache = e.target.checked;
+    handleUpdateModel(newModel);
+  };
+
+  const handleCacheTtlHours = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.cacheTtlHours = e.target.value;
+    handleUpdateModel(newModel);
+  };
+
+  const handleCacheMaxEntries = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.cacheMaxEntries = e.target.value;
+    handleUpdateModel(newModel);
+  };
+
+  const handleFetchPageText = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.fetchPageText = e.target.checked;
+    handleUpdateModel(newModel);
+  };
+
+  const handlePageConcurrency = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.pageConcurrency = e.target.value;
+    handleUpdateModel(newModel);
+  };
+
+  const handlePageConnectionsPerHost = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.pageConnectionsPerHost = e.target.value;
+    handleUpdateModel(newModel);
+  };
+
+  const handlePageTimeoutSeconds = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.pageTimeoutSeconds = e.target.value;
+    handleUpdateModel(newModel);
+  };
+
+  const handlePageMaxKB = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.pageMaxKB = e.target.value;
+    handleUpdateModel(newModel);
+  };
+
+  const handleOutputModeChange = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.outputMode = e.target.value;
+    handleUpdateModel(newModel);
+  };
+
+  const handleLogLevelChange = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.logLevel = e.target.value;
+    handleUpdateModel(newModel);
+  };
+
+  const handleLogTruncate = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.logTruncate = e.target.value;
+    handleUpdateModel(newModel);
+  };
+
+  const handleLogSampleRate = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.logSampleRate = e.target.value;
+    handleUpdateModel(newModel);
+  };
+
+  const handleTraceFile = (e) => {
+    const newModel = { ...model };
+    newModel.Configuration.traceFile = e.target.value;
+    handleUpdateModel(newModel);
+  };
+
   return (
     <Box p={4}>
 
@@ -59,9 +161,170 @@ const App = () => {
         id="max_search_num"
         value={model.Configuration.maxNum}
         onChange={handleMaxNum}
-        label="Max search number (must be between 1 and 10)"
+        label="Max results per query (must be between 1 and 100)"
       />
+
+      <Typography variant="h5" gutterBottom>
+        Queries per second (default: 1):
+      </Typography>
+      <TextField
+        type="number"
+        id="queries_per_second"
+        value={model.Configuration.queriesPerSecond || 1}
+        onChange={handleQueriesPerSecond}
+        label="Set to your Custom Search API quota"
+      />
+
+      <Typography variant="h5" gutterBottom>
+        Concurrent searches (default: 4):
+      </Typography>
+      <TextField
+        type="number"
+        id="max_workers"
+        value={model.Configuration.maxWorkers || 4}
+        onChange={handleMaxWorkers}
+        label="Number of searches to run at once"
+      />
+      <Typography variant="h5" gutterBottom>
+        Input memory limit in MB (default: 256):
+      </Typography>
+      <TextField
+        fullWidth
+        id="spill_threshold_mb"
+        value={model.Configuration.spillThresholdMB || 256}
+        type="number"
+        onChange={handleSpillThresholdMB}
+        label="Input beyond this size is buffered in a temporary file"
+      />
+
+      <Box mt={3}>
+        <FormControlLabel
+          control={
+            <Checkbox
+              checked={String(model.Configuration.useCheckpoint) === 'true'}
+              onChange={handleUseCheckpoint}
+            />
+          }
+          label="Save progress and resume interrupted runs (only unfinished queries are searched again)"
+        />
+        <FormControlLabel
+          control={
+            <Checkbox
+              checked={String(model.Configuration.useCache) === 'true'}
+              onChange={handleUseCache}
+            />
+          }
+          label="Cache search results locally"
+        />
+        <TextField
+          type="number"
+          id="cache_ttl_hours"
+          value={model.Configuration.cacheTtlHours || 24}
+          onChange={handleCacheTtlHours}
+          label="Cache expiry in hours (default: 24)"
+        />
+        <TextField
+          type="number"
+          id="cache_max_entries"
+          value={model.Configuration.cacheMaxEntries || 10000}
+          onChange={handleCacheMaxEntries}
+          label="Max cached queries (default: 10000)"
+        />
+      </Box>
+
+      <Box mt={3}>
+        <FormControlLabel
+          control={
+            <Checkbox
+              checked={String(model.Configuration.fetchPageText) === 'true'}
+              onChange={handleFetchPageText}
+            />
+          }
+          label="Fetch each result's page and add its main text as a page_text column"
+        />
+        <TextField
+          type="number"
+          id="page_concurrency"
+          value={model.Configuration.pageConcurrency || 20}
+          onChange={handlePageConcurrency}
+          label="Pages fetched at once (default: 20)"
+        />
+        <TextField
+          type="number"
+          id="page_connections_per_host"
+          value={model.Configuration.pageConnectionsPerHost || 2}
+          onChange={handlePageConnectionsPerHost}
+          label="Connections per website (default: 2)"
+        />
+        <TextField
+          type="number"
+          id="page_timeout_seconds"
+          value={model.Configuration.pageTimeoutSeconds || 10}
+          onChange={handlePageTimeoutSeconds}
+          label="Page timeout in seconds (default: 10)"
+        />
+        <TextField
+          type="number"
+          id="page_max_kb"
+          value={model.Configuration.pageMaxKB || 512}
+          onChange={handlePageMaxKB}
+          label="Max KB read per page (default: 512)"
+        />
+      </Box>
+
+      <Box mt={3}>
+        <Typography variant="h6" gutterBottom>
+          Select Output Mode:
+        </Typography>
+        <RadioGroup
+          value={model.Configuration.outputMode || 'buffered'}
+          onChange={handleOutputModeChange}
+          aria-label="output mode"
+          name="output-mode-group"
+        >
+          <FormControlLabel value="buffered" control={<Radio />} label="Output when all searches are complete" />
+          <FormControlLabel value="streaming" control={<Radio />} label="Stream results as each batch is searched" />
+        </RadioGroup>
+      </Box>
       
+
+      <Box mt={3}>
+        <Typography variant="h6" gutterBottom>
+          Log Level:
+        </Typography>
+        <RadioGroup
+          value={model.Configuration.logLevel || 'info'}
+          onChange={handleLogLevelChange}
+          aria-label="log level"
+          name="log-level-group"
+        >
+          <FormControlLabel value="debug" control={<Radio />} label="Debug (prompts, responses and sampled per-row messages)" />
+          <FormControlLabel value="info" control={<Radio />} label="Info" />
+          <FormControlLabel value="warn" control={<Radio />} label="Warnings and errors only" />
+          <FormControlLabel value="error" control={<Radio />} label="Errors only" />
+        </RadioGroup>
+        <TextField
+          type="number"
+          id="log_truncate"
+          value={model.Configuration.logTruncate || 500}
+          onChange={handleLogTruncate}
+          label="Characters of each logged payload (default: 500)"
+        />
+        <TextField
+          type="number"
+          id="log_sample_rate"
+          value={model.Configuration.logSampleRate || 100}
+          onChange={handleLogSampleRate}
+          label="Log 1 in every N per-row messages (default: 100)"
+        />
+        <TextField
+          fullWidth
+          id="trace_file"
+          value={model.Configuration.traceFile || ''}
+          onChange={handleTraceFile}
+          label="Trace file for full payloads (optional)"
+        />
+      </Box>
     </Box>
   );
 };